@@ -1,6 +1,12 @@
 from main import main
+from scripts.tts_server import ensure_tts_server
 import time
 if __name__ == "__main__":
+    # Keep the TTS model loaded across iterations instead of reloading it per video
+    try:
+        ensure_tts_server()
+    except Exception as e:
+        print(f"TTS server unavailable, voiceover will load the model in-process: {str(e)}")
     while True:
         main()
         time.sleep(1)
@@ -1,5 +1,6 @@
 import os
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from scripts.upload_instagram import upload_reel
 from scripts.upload_youtube import upload_short
 from scripts.error_handler import handle_errors, logging
@@ -7,6 +8,13 @@ from scripts.topic_generator import generate_topic
 from scripts.script_generator import generate_script, save_script
 from scripts.voiceover_generator import generate_voiceover
 from scripts.video_generator import generate_video
+from scripts.cover_generator import cover_path, generate_cover
+from scripts.variants import generate_variants, variant_path
+from scripts.pipeline import generate_voiceover_and_video
+from scripts.timeline import timeline_path
+from scripts.workflow import Stage, Workflow
+from scripts.workspace import RunWorkspace, apply_retention, latest_run_id
+from scripts.config import CHARACTERS, RENDER_PROFILES, set_render_profile
 
 # Create necessary directories
 os.makedirs("generated", exist_ok=True)
@@ -15,65 +23,142 @@ os.makedirs("generated/videos", exist_ok=True)
 os.makedirs("generated/scripts", exist_ok=True)
 os.makedirs("generated/topics", exist_ok=True)
 
+# -task numbers mapped onto workflow stages. The cover and variants stages are in
+# none of them: they are never skipped and just rerun whenever the video changed.
+TASK_STAGES = {
+    1: ["topic"],
+    2: ["script"],
+    3: ["voiceover", "voiceover_video"],
+    4: ["video", "voiceover_video"],
+    5: ["instagram"],
+    6: ["youtube"],
+}
+
+
+def build_workflow(result: dict, workspace: RunWorkspace, pipeline: bool = False) -> Workflow:
+    """
+    Declare the stages with the files they read and write inside the run's workspace.
+    Stage results are recorded into result.
+    """
+    speaker_files = [character["audio_json_path"] for character in CHARACTERS.values()]
+    image_files = [character["image_path"] for character in CHARACTERS.values()]
+    timeline_file = timeline_path(workspace.audio_path)
+    cover_file = cover_path(workspace.video_path)
+    instagram_video = variant_path(workspace.video_path, "instagram")
+    youtube_video = variant_path(workspace.video_path, "youtube")
+
+    def topic_stage():
+        result["topic"] = generate_topic(output_path=workspace.topic_path)
+        logging.info(f"Generated topic: {result['topic']}")
+
+    def script_stage():
+        with open(workspace.topic_path, 'r') as f:
+            topic = f.read().strip()
+        save_script(generate_script(topic), workspace.script_path)
+        logging.info(f"Script saved to {workspace.script_path}")
+
+    def voiceover_stage():
+        generate_voiceover(workspace.script_path, workspace.audios_dir)
+        logging.info(f"Voiceover saved to {workspace.audio_path}")
+
+    def video_stage():
+        generate_video(workspace.audio_path, workspace.video_path)
+        logging.info(f"Video saved to {workspace.video_path}")
+
+    def voiceover_video_stage():
+        generate_voiceover_and_video(workspace.script_path, workspace.audios_dir, workspace.segments_dir, workspace.video_path)
+        logging.info(f"Voiceover saved to {workspace.audio_path}")
+        logging.info(f"Video saved to {workspace.video_path}")
+
+    def cover_stage():
+        generate_cover(workspace.video_path, workspace.audio_path)
+
+    def variants_stage():
+        generate_variants(workspace.video_path, ["instagram", "youtube"])
+
+    def instagram_stage():
+        result["uploads"]["instagram"] = upload_reel(workspace.video_path, workspace.script_path, cover_file)
+        logging.info("Video uploaded to Instagram successfully!")
+
+    def youtube_stage():
+        result["uploads"]["youtube"] = upload_short(workspace.video_path, workspace.topic_path, cover_file)
+        logging.info("Video uploaded to YouTube successfully!")
+
+    stages = [
+        # A new topic every run; everything downstream follows from its hash
+        Stage("topic", topic_stage, outputs=[workspace.topic_path], always_run=True),
+        Stage("script", script_stage, inputs=[workspace.topic_path], outputs=[workspace.script_path], deps=["topic"]),
+    ]
+    if pipeline:
+        stages.append(Stage("voiceover_video", voiceover_video_stage,
+                            inputs=[workspace.script_path] + speaker_files + image_files,
+                            outputs=[workspace.audio_path, timeline_file, workspace.video_path], deps=["script"]))
+        video_stage_name = "voiceover_video"
+    else:
+        stages.append(Stage("voiceover", voiceover_stage, inputs=[workspace.script_path] + speaker_files,
+                            outputs=[workspace.audio_path, timeline_file], deps=["script"]))
+        stages.append(Stage("video", video_stage, inputs=[workspace.audio_path, timeline_file] + image_files,
+                            outputs=[workspace.video_path], deps=["voiceover"]))
+        video_stage_name = "video"
+    stages.append(Stage("cover", cover_stage, inputs=[workspace.video_path, timeline_file], outputs=[cover_file], deps=[video_stage_name]))
+    stages.append(Stage("variants", variants_stage, inputs=[workspace.video_path], outputs=[instagram_video, youtube_video], deps=[video_stage_name]))
+    stages.append(Stage("instagram", instagram_stage, inputs=[instagram_video, workspace.script_path, cover_file], deps=["cover", "variants"]))
+    # The two uploads don't depend on each other, so the workflow publishes them concurrently
+    stages.append(Stage("youtube", youtube_stage, inputs=[youtube_video, workspace.topic_path, cover_file], deps=["cover", "variants"]))
+
+    return Workflow(stages, workspace.state_file)
+
+
 @handle_errors("MainWorkflow")
-def run_workflow(start_task: int = 1) -> dict:
+def run_workflow(start_task: int = None, pipeline: bool = False, run_id: str = None) -> dict:
     """
-    Run the workflow from a specified task number.
+    Run the workflow, rerunning only the stages whose inputs changed.
     Args:
-        start_task: Task number to start from (1-6)
+        start_task: Task number to start from (1-6). Earlier stages are skipped
+            and this one and all later ones are forced to run.
+        pipeline: Overlap voiceover and video rendering (steps 3 and 4)
+        run_id: Existing run to continue; a new run workspace is created if omitted
     Returns a dictionary with the status of each step and output paths.
     """
     try:
+        workspace = RunWorkspace(run_id)
+        if workspace.media_deleted():
+            raise ValueError(f"Run {workspace.run_id} was already published and its media deleted; start a new run")
+        logging.info(f"Run {workspace.run_id} in {workspace.root}")
         result = {
             "status": "success",
+            "run_id": workspace.run_id,
             "topic": None,
-            "script_path": "generated/scripts/generated_script.json",
-            "audio_path": "generated/audios/combined_voiceover.mp3",
-            "video_path": "generated/videos/final_video.mp4"
+            "script_path": workspace.script_path,
+            "audio_path": workspace.audio_path,
+            "video_path": workspace.video_path,
+            "uploads": {},
         }
-        
-        # Step 1: Generate topic
-        if start_task <= 1:
-            logging.info("Generating topic...")
-            topic = generate_topic()
-            result["topic"] = topic
-            logging.info(f"Generated topic: {topic}")
-        
-        # Step 2: Generate script
-        if start_task <= 2:
-            logging.info("Generating script...")
-            script = generate_script(result["topic"])
-            save_script(script)
-            logging.info(f"Script saved to {result['script_path']}")
-        
-        # Step 3: Generate voiceover
-        if start_task <= 3:
-            logging.info("Generating voiceover...")
-            audio_file = generate_voiceover()
-            result["audio_path"] = audio_file
-            logging.info(f"Voiceover saved to {audio_file}")
-        
-        # Step 4: Generate video
-        if start_task <= 4:
-            logging.info("Generating video...")
-            video_file = generate_video()
-            result["video_path"] = video_file
-            logging.info(f"Video saved to {video_file}")
-        
-        # Step 5: Upload video to Instagram
-        if start_task <= 5:
-            logging.info("Uploading video to Instagram...")
-            upload_reel(result["video_path"])
-            logging.info("Video uploaded to Instagram successfully!")
-        
-        # Step 6: Upload video to YouTube
-        if start_task <= 6:
-            logging.info("Uploading video to YouTube...")
-            upload_short(result["video_path"])
-            logging.info("Video uploaded to YouTube successfully!")
-        
+
+        workflow = build_workflow(result, workspace, pipeline)
+        force, skip = set(), set()
+        if start_task is not None:
+            for task, names in TASK_STAGES.items():
+                (skip if task < start_task else force).update(names)
+            # In pipeline mode steps 3 and 4 are one stage; -task 4 reruns it
+            skip -= force
+
+        result["stages"] = workflow.run(force=force, skip=skip)
+        failed = [name for name, status in result["stages"].items() if status.startswith("failed") or status == "blocked"]
+        if failed:
+            result["status"] = "error"
+            result["error"] = f"Stages did not complete: {', '.join(failed)}"
+
+        # Every run leaves a new workspace behind, so the launcher loop would otherwise fill the disk
+        published = all(result["stages"].get(name) in ("ran", "up-to-date") for name in ("instagram", "youtube"))
+        try:
+            deleted = apply_retention(workspace, published)
+            if deleted:
+                logging.info(f"Deleted {len(deleted)} old run(s): {', '.join(deleted)}")
+        except OSError as e:
+            logging.warning(f"Run cleanup failed: {str(e)}")
         return result
-        
+
     except Exception as e:
         logging.error(f"Workflow failed: {str(e)}")
         return {
@@ -81,28 +166,66 @@ def run_workflow(start_task: int = 1) -> dict:
             "error": str(e)
         }
 
+
+def run_jobs(jobs: int, pipeline: bool = False) -> list:
+    """
+    Produce several videos in parallel, each in its own process and run workspace.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(run_workflow, None, pipeline) for _ in range(jobs)]
+        return [future.result() for future in futures]
+
+
+def print_result(result: dict):
+    if result["status"] == "success":
+        print(f"\nWorkflow {result['run_id']} completed successfully!")
+        if result["topic"]:
+            print(f"Topic: {result['topic']}")
+        print(f"Script: {result['script_path']}")
+        print(f"Audio: {result['audio_path']}")
+        print(f"Video: {result['video_path']}")
+    else:
+        print(f"\nWorkflow failed: {result['error']}")
+    for platform, upload in result.get("uploads", {}).items():
+        print(f"{platform}: {upload['url']}")
+    for stage, status in result.get("stages", {}).items():
+        print(f"  {stage}: {status}")
+
 def main():
     try:
         parser = argparse.ArgumentParser()
-        parser.add_argument("-task", type=int, default=1, help="Task number to start from (1-6)")
+        parser.add_argument("-task", type=int, default=None, help="Task number to start from (1-6); by default only out-of-date stages run")
+        parser.add_argument("--pipeline", action="store_true", help="Render video segments while the voiceover is still being generated")
+        parser.add_argument("--run-id", help="Continue an existing run (defaults to the latest run when -task > 1)")
+        parser.add_argument("--jobs", type=int, default=1, help="Number of videos to produce in parallel")
+        parser.add_argument("--profile", choices=list(RENDER_PROFILES), help="Render profile (defaults to $RENDER_PROFILE or master)")
         args = parser.parse_args()
-        
-        if not 1 <= args.task <= 6:
+
+        if args.task is not None and not 1 <= args.task <= 6:
             raise ValueError("Task number must be between 1 and 6")
-            
-        result = run_workflow(args.task)
-        if result["status"] == "success":
-            print("\nWorkflow completed successfully!")
-            if result["topic"]:
-                print(f"Topic: {result['topic']}")
-            print(f"Script: {result['script_path']}")
-            print(f"Audio: {result['audio_path']}")
-            print(f"Video: {result['video_path']}")
+        if args.jobs < 1:
+            raise ValueError("--jobs must be at least 1")
+        if args.profile:
+            set_render_profile(args.profile)
+
+        if args.jobs > 1:
+            if args.task is not None or args.run_id:
+                raise ValueError("--jobs starts new runs and can't be combined with -task or --run-id")
+            results = run_jobs(args.jobs, pipeline=args.pipeline)
         else:
-            print(f"\nWorkflow failed: {result['error']}")
+            run_id = args.run_id
+            # Resuming from a later step needs the earlier steps' outputs
+            if run_id is None and args.task is not None and args.task > 1:
+                run_id = latest_run_id()
+                if run_id is None:
+                    raise ValueError(f"No previous run to continue from task {args.task}")
+            results = [run_workflow(args.task, pipeline=args.pipeline, run_id=run_id)]
+
+        for result in results:
+            print_result(result)
     except Exception as e:
         logging.error(f"Main workflow failed: {str(e)}")
         raise
     
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
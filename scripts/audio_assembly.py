@@ -0,0 +1,76 @@
+"""
+In-memory voiceover assembly.
+
+Synthesized lines are kept as mono float32 NumPy PCM. They are concatenated
+once into a single buffer and piped straight into one ffmpeg encode, so no
+per-line WAV round-trips or repeated buffer copies are needed.
+"""
+import subprocess
+import wave
+import numpy as np
+from scripts.config import FFMPEG_BINARY
+
+# Bytes written to ffmpeg per pipe write
+PIPE_CHUNK_BYTES = 1 << 20
+
+
+def to_pcm(output) -> tuple:
+    """
+    Convert an OuteTTS generation output into (mono float32 samples, sample rate).
+    """
+    # OuteTTS returns (batch, channels, samples), i.e. (1, 1, N); older versions (channels, N)
+    pcm = output.audio.detach().cpu().float().numpy()
+    if pcm.ndim == 3:
+        assert pcm.shape[0] == 1, f"expected one generated clip, got audio of shape {pcm.shape}"
+        pcm = pcm[0]
+    if pcm.ndim == 2:
+        pcm = pcm.mean(axis=0)
+    assert pcm.ndim == 1, f"expected mono PCM, got audio of shape {pcm.shape}"
+    return np.ascontiguousarray(pcm, dtype=np.float32), int(output.sr)
+
+
+def write_wav(path: str, pcm: np.ndarray, sample_rate: int):
+    """
+    Write mono float PCM as a 16-bit WAV file.
+    """
+    samples = (np.clip(pcm, -1.0, 1.0) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+
+
+def concatenate(pcms: list) -> np.ndarray:
+    """
+    Join line buffers with a single allocation and one copy per line.
+    """
+    combined = np.empty(sum(len(pcm) for pcm in pcms), dtype=np.float32)
+    offset = 0
+    for pcm in pcms:
+        combined[offset:offset + len(pcm)] = pcm
+        offset += len(pcm)
+    return combined
+
+
+def encode(pcm: np.ndarray, sample_rate: int, output_path: str, codec_args: list = None):
+    """
+    Stream raw PCM into a single ffmpeg encode. The codec is picked from the
+    output extension unless codec_args are given.
+    """
+    command = [
+        FFMPEG_BINARY, '-y', '-loglevel', 'error',
+        '-f', 'f32le', '-ar', str(sample_rate), '-ac', '1', '-i', 'pipe:0',
+        *(codec_args or []),
+        output_path
+    ]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    data = memoryview(pcm.astype('<f4', copy=False)).cast('B')
+    try:
+        for start in range(0, len(data), PIPE_CHUNK_BYTES):
+            process.stdin.write(data[start:start + PIPE_CHUNK_BYTES])
+    finally:
+        process.stdin.close()
+    stderr = process.stderr.read()
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg audio encode failed: {stderr.decode(errors='replace')}")
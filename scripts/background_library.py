@@ -0,0 +1,118 @@
+"""
+Preprocessed background footage.
+
+Each background is transcoded once into a 9:16 mezzanine already at the
+output resolution and frame rate, with keyframes on a fixed interval. A
+keyframe index (timestamps and byte offsets) is stored next to it, so a
+render can start at any keyframe and read only the frames it needs instead
+of cropping and resizing the source from the start every time.
+"""
+import hashlib
+import json
+import os
+import random
+import subprocess
+from scripts.helpers.dowload_sample import SAMPLE_VIDEO_PATH, download_sample_video
+from scripts.helpers.file_lock import file_lock
+from scripts.helpers.hashing import file_sha256
+import scripts.config as config
+
+
+def mezzanine_key(source: str) -> str:
+    """
+    Cache key of a source video at the current output geometry and keyframe settings.
+    """
+    settings = config.VIDEO_SETTINGS
+    payload = json.dumps({
+        "source": file_sha256(source),
+        "size": [settings["width"], settings["height"]],
+        "fps": settings["fps"],
+        "keyframe_interval": config.BACKGROUND_LIBRARY["keyframe_interval"],
+        "crf": config.BACKGROUND_LIBRARY["crf"],
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def transcode(source: str, output_path: str):
+    """
+    Crop to 9:16, scale to the output size, resample to the output fps and
+    place a keyframe every keyframe_interval seconds. Audio is dropped.
+    """
+    settings = config.VIDEO_SETTINGS
+    library = config.BACKGROUND_LIBRARY
+    gop = max(1, round(settings["fps"] * library["keyframe_interval"]))
+    subprocess.run([
+        config.FFMPEG_BINARY, '-y', '-loglevel', 'error',
+        '-i', source,
+        '-vf', f"crop=ih*9/16:ih,scale={settings['width']}:{settings['height']},fps={settings['fps']}",
+        '-an',
+        '-c:v', 'libx264', '-preset', library["preset"], '-crf', str(library["crf"]),
+        '-g', str(gop), '-keyint_min', str(gop), '-sc_threshold', '0',
+        '-pix_fmt', 'yuv420p', '-movflags', '+faststart',
+        output_path
+    ], check=True)
+
+
+def keyframe_index(video_path: str) -> dict:
+    """
+    Duration and keyframe list ({"time", "pos"}) of a video, read with ffprobe
+    without decoding the non-key frames.
+    """
+    result = subprocess.run([
+        config.FFPROBE_BINARY, '-v', 'error', '-select_streams', 'v:0',
+        '-skip_frame', 'nokey',
+        '-show_entries', 'frame=pts_time,pkt_pos:format=duration',
+        '-of', 'json', video_path
+    ], check=True, capture_output=True, text=True)
+    probe = json.loads(result.stdout)
+    keyframes = [
+        {"time": float(frame["pts_time"]), "pos": int(frame.get("pkt_pos", -1))}
+        for frame in probe.get("frames", [])
+        if "pts_time" in frame
+    ]
+    return {
+        "duration": float(probe["format"]["duration"]),
+        "keyframes": keyframes,
+    }
+
+
+def prepare_background(source: str = SAMPLE_VIDEO_PATH) -> dict:
+    """
+    Return the library entry for a background, building it on first use.
+    The entry holds the mezzanine path, its duration and its keyframe index.
+    """
+    if source == SAMPLE_VIDEO_PATH:
+        download_sample_video(config.YOUTUBE_SETTINGS['background_video_url'])
+
+    library_dir = config.BACKGROUND_LIBRARY["dir"]
+    os.makedirs(library_dir, exist_ok=True)
+    key = mezzanine_key(source)
+    video_path = os.path.join(library_dir, f"{key}.mp4")
+    index_path = os.path.join(library_dir, f"{key}.json")
+
+    # Parallel runs wait for whichever one is already transcoding this background
+    with file_lock(index_path, timeout=3600, stale_after=3600):
+        if not os.path.exists(index_path):
+            print(f"Preparing background {source} for the library...")
+            tmp_path = os.path.join(library_dir, f"{key}.tmp.mp4")
+            transcode(source, tmp_path)
+            os.replace(tmp_path, video_path)
+            entry = {"source": source, "path": video_path, **keyframe_index(video_path)}
+            with open(index_path, 'w') as f:
+                json.dump(entry, f, indent=4)
+            return entry
+
+    with open(index_path, 'r') as f:
+        return json.load(f)
+
+
+def pick_offset(background: dict, duration: float) -> float:
+    """
+    Start time for a clip of the given duration: a random keyframe that
+    leaves enough footage after it, or 0 if random offsets are disabled.
+    """
+    if not config.BACKGROUND_LIBRARY["random_offset"]:
+        return 0.0
+    latest = background["duration"] - duration
+    candidates = [keyframe["time"] for keyframe in background["keyframes"] if keyframe["time"] <= latest]
+    return random.choice(candidates) if candidates else 0.0
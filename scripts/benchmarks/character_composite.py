@@ -0,0 +1,58 @@
+"""
+Benchmark per-frame character compositing.
+
+Compares the old MoviePy path (ImageClip resized at load and again per
+line, blended by CompositeVideoClip) with blitting the pre-scaled,
+premultiplied sprite, on a plain background at the output resolution.
+
+    python -m scripts.benchmarks.character_composite [--frames 120]
+"""
+import argparse
+import time
+from moviepy.editor import ColorClip, CompositeVideoClip, ImageClip
+from scripts.sprites import load_character_sprites
+from scripts.video_generator import with_characters
+import scripts.config as config
+
+
+def time_frames(clip, frames: int) -> float:
+    """
+    Average milliseconds to produce one frame of clip.
+    """
+    fps = config.VIDEO_SETTINGS["fps"]
+    clip.get_frame(0)  # Warm up lazy loading
+    start = time.perf_counter()
+    for index in range(frames):
+        clip.get_frame(index / fps)
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=120)
+    args = parser.parse_args()
+
+    settings = config.VIDEO_SETTINGS
+    duration = args.frames / settings["fps"]
+    character = config.CHARACTERS["character1"]
+    background = ColorClip((settings["width"], settings["height"]), color=(40, 40, 40), duration=duration)
+    line = {"speaker": character["name"], "start": 0.0, "end": duration}
+
+    # Before: resize at load, then again for the line, evaluated lazily per frame
+    width = background.w * settings["character_width"]
+    char_clip = ImageClip(character["image_path"]).resize(width=width).set_position(('left', 'bottom'))
+    char_clip = char_clip.set_start(0).set_end(duration).resize(width=width)
+    before = time_frames(CompositeVideoClip([background, char_clip]), args.frames)
+
+    # After: blit the cached sprite
+    after = time_frames(with_characters(background, [line], load_character_sprites(background.w)), args.frames)
+
+    print(f"\n{settings['width']}x{settings['height']}, {args.frames} frames")
+    print(f"{'path':<22} {'ms/frame':>9}")
+    print(f"{'resize + composite':<22} {before:>9.2f}")
+    print(f"{'pre-scaled sprite':<22} {after:>9.2f}")
+    print(f"speed-up: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark the video render engines on an existing voiceover.
+
+Renders the same voiceover + timeline with each engine into a temporary
+directory and reports wall time, real-time factor (render time / video
+duration, lower is faster), output size and peak memory of the render
+(Python process plus ffmpeg children).
+
+    python -m scripts.benchmarks.render_engines [--audio generated/audios/combined_voiceover.m4a] [--engines moviepy ffmpeg stream]
+"""
+import argparse
+import os
+import tempfile
+import time
+from scripts.helpers.metrics import MemorySampler
+from scripts.timeline import load_timeline
+from scripts.video_generator import SPEED_FACTOR, generate_video
+
+DEFAULT_ENGINES = ["moviepy", "ffmpeg", "stream"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--audio", default="generated/audios/combined_voiceover.m4a", help="Voiceover with a timeline manifest")
+    parser.add_argument("--engines", nargs="+", default=DEFAULT_ENGINES)
+    args = parser.parse_args()
+
+    video_seconds = load_timeline(args.audio)["duration"] / SPEED_FACTOR
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for engine in args.engines:
+            output_path = os.path.join(tmp_dir, f"{engine}.mp4")
+            start = time.perf_counter()
+            try:
+                with MemorySampler() as memory:
+                    generate_video(args.audio, output_path, engine=engine)
+            except Exception as e:
+                rows.append({"engine": engine, "error": str(e)})
+                continue
+            elapsed = time.perf_counter() - start
+            rows.append({
+                "engine": engine,
+                "wall": elapsed,
+                "rtf": elapsed / video_seconds,
+                "size_mb": os.path.getsize(output_path) / (1024 * 1024),
+                "peak_mb": memory.peaks()["total_mb"],
+            })
+
+    print(f"\nVideo duration: {video_seconds:.1f}s")
+    print(f"{'engine':<10} {'wall (s)':>9} {'RTF':>7} {'size (MB)':>10} {'peak (MB)':>10}")
+    for row in rows:
+        if "error" in row:
+            print(f"{row['engine']:<10} failed: {row['error']}")
+            continue
+        peak = f"{row['peak_mb']:.0f}" if row["peak_mb"] is not None else "n/a"
+        print(f"{row['engine']:<10} {row['wall']:>9.1f} {row['rtf']:>7.2f} {row['size_mb']:>10.1f} {peak:>10}")
+
+
+if __name__ == "__main__":
+    main()
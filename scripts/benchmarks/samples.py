@@ -0,0 +1,14 @@
+"""
+Fixed inputs shared by the benchmarks, so results are comparable between runs.
+"""
+
+SAMPLE_SCRIPT = {
+    "1": {"walter": "Jesse, listen carefully. Let me explain React Hooks."},
+    "2": {"jesse": "Yo! Mister White! What are Hooks?"},
+    "3": {"walter": "They let function components keep state, Jesse."},
+    "4": {"jesse": "So no more class components? That's wild, yo."},
+    "5": {"walter": "Exactly. useState for state, useEffect for side effects."},
+    "6": {"jesse": "Science, bitch! Hooks are the future!"},
+    "7": {"walter": "Just remember the rules. Only call them at the top level."},
+    "8": {"jesse": "Top level. Got it, Mister White."},
+}
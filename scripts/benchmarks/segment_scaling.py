@@ -0,0 +1,39 @@
+"""
+Benchmark segment-parallel MoviePy rendering across worker counts.
+
+Renders the same voiceover + timeline as one encode and then split into
+per-line segments with 2, 4, 8, ... worker processes, and reports wall time
+and speed-up over the single encode.
+
+    python -m scripts.benchmarks.segment_scaling [--audio generated/audios/combined_voiceover.m4a] [--workers 2 4 8 16 32]
+"""
+import argparse
+import os
+import tempfile
+import time
+from scripts.video_generator import generate_video
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--audio", default="generated/audios/combined_voiceover.m4a", help="Voiceover with a timeline manifest")
+    parser.add_argument("--workers", nargs="+", type=int, default=[2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 1 worker is the single-stream baseline
+        for workers in [1] + [w for w in args.workers if w > 1]:
+            output_path = os.path.join(tmp_dir, f"segments_{workers}.mp4")
+            start = time.perf_counter()
+            generate_video(args.audio, output_path, engine="moviepy", segment_workers=workers)
+            rows.append((workers, time.perf_counter() - start))
+
+    baseline = rows[0][1]
+    print(f"\n{'workers':>7} {'wall (s)':>9} {'speed-up':>9}")
+    for workers, elapsed in rows:
+        print(f"{workers:>7} {elapsed:>9.1f} {baseline / elapsed:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
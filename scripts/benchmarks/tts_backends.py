@@ -0,0 +1,72 @@
+"""
+Benchmark TTS backends and quantizations on a fixed set of script lines.
+
+Each backend runs in its own process so peak RSS is measured per backend.
+Reports load time, real-time factor (synthesis time / audio duration, lower
+is faster) and peak RSS.
+
+    python -m scripts.benchmarks.tts_backends [--backends HF:FP16 LLAMACPP:Q8_0 ...]
+"""
+import argparse
+import multiprocessing
+import time
+from scripts.benchmarks.samples import SAMPLE_SCRIPT
+from scripts.helpers.metrics import peak_rss_mb
+from scripts.voiceover_generator import LocalSynthesizer, generation_config, parse_script
+
+DEFAULT_BACKENDS = ["HF:FP16", "LLAMACPP:Q8_0", "LLAMACPP:Q5_K_M", "LLAMACPP:Q4_K_M"]
+
+
+def run_backend(spec: str, results: multiprocessing.Queue):
+    backend, quantization = spec.split(":")
+    try:
+        start = time.perf_counter()
+        synthesizer = LocalSynthesizer(backend, quantization)
+        load_time = time.perf_counter() - start
+
+        synth_time = 0.0
+        audio_seconds = 0.0
+        for line in parse_script(SAMPLE_SCRIPT, "."):
+            start = time.perf_counter()
+            output = synthesizer.interface.generate(
+                config=generation_config(line["text"], synthesizer.speakers[line["character"]])
+            )
+            synth_time += time.perf_counter() - start
+            audio_seconds += output.audio.shape[-1] / output.sr
+
+        results.put({
+            "backend": spec,
+            "load": load_time,
+            "rtf": synth_time / audio_seconds,
+            "peak_rss_mb": peak_rss_mb(),
+        })
+    except Exception as e:
+        results.put({"backend": spec, "error": str(e)})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=DEFAULT_BACKENDS, help="BACKEND:QUANTIZATION pairs")
+    args = parser.parse_args()
+
+    # A fresh process per backend keeps model memory from leaking into the next measurement
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    rows = []
+    for spec in args.backends:
+        process = context.Process(target=run_backend, args=(spec, results))
+        process.start()
+        rows.append(results.get())
+        process.join()
+
+    print(f"\n{'backend':<20} {'load (s)':>9} {'RTF':>7} {'peak RSS (MB)':>14}")
+    for row in rows:
+        if "error" in row:
+            print(f"{row['backend']:<20} failed: {row['error']}")
+            continue
+        rss = f"{row['peak_rss_mb']:.0f}" if row["peak_rss_mb"] is not None else "n/a"
+        print(f"{row['backend']:<20} {row['load']:>9.1f} {row['rtf']:>7.2f} {rss:>14}")
+
+
+if __name__ == "__main__":
+    main()
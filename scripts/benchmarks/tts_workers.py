@@ -0,0 +1,61 @@
+"""
+Benchmark the multi-process TTS worker pool against the serial path.
+
+Synthesizes the same script with the in-process serial loop and with a
+pool of 1, 2, 4 and 8 worker processes, and reports wall-clock time (model
+loading included). The serial baseline always loads the model in-process,
+even when a TTS server is running.
+
+    python -m scripts.benchmarks.tts_workers [--script generated/scripts/generated_script.json]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from scripts.benchmarks.samples import SAMPLE_SCRIPT
+from scripts.voiceover_generator import LocalSynthesizer, parse_script, synthesize_lines, synthesize_parallel
+
+
+def run_serial(lines: list) -> float:
+    # Always load the model here rather than using a running TTS server, so the baseline pays the load too
+    start = time.perf_counter()
+    synthesizer = LocalSynthesizer()
+    synthesize_lines(lines, synthesizer=synthesizer)
+    return time.perf_counter() - start
+
+
+def run_pool(lines: list, workers: int) -> float:
+    # synthesize_lines only starts a pool for workers > 1; go through the pool for 1 worker too
+    start = time.perf_counter()
+    synthesize_parallel(lines, workers)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--script", help="Script JSON to synthesize (defaults to a built-in sample)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    script = SAMPLE_SCRIPT
+    if args.script:
+        with open(args.script, 'r') as f:
+            script = json.load(f)
+
+    results = []
+    with tempfile.TemporaryDirectory() as audios_path:
+        lines = parse_script(script, audios_path)
+        results.append(("serial", run_serial(lines)))
+        for workers in args.workers:
+            results.append((f"{workers} workers", run_pool(lines, workers)))
+
+    baseline = results[0][1]
+    print(f"\n{len(lines)} lines on {os.cpu_count()} cores")
+    print(f"{'mode':<12} {'wall (s)':>10} {'speedup':>8}")
+    for mode, elapsed in results:
+        print(f"{mode:<12} {elapsed:>10.1f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
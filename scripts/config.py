@@ -3,6 +3,7 @@
 Configuration settings for the YouTube script generation project.
 This file contains all the necessary parameters for script generation, video settings, and character configurations.
 """
+import os
 
 # YouTube Video Settings
 YOUTUBE_SETTINGS = {
@@ -43,8 +44,219 @@ CONTENT_NOTES = {
     "references": [],  
 }
 
+# Path to the ffmpeg executable used for encoding
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.getenv("FFPROBE_BINARY", "ffprobe")
+
+# Text-to-Speech Settings
+TTS_SETTINGS = {
+    "model_path": "OuteAI/Llama-OuteTTS-1.0-1B",
+    "tokenizer_path": "OuteAI/Llama-OuteTTS-1.0-1B",
+    "auto_model": "VERSION_1_0_SIZE_1B",  # outetts.Models entry used by the LLAMACPP backend
+    "backend": os.getenv("TTS_BACKEND", "HF"),  # HF or LLAMACPP; OuteTTS can't build the other backends from this config
+    "quantization": os.getenv("TTS_QUANTIZATION", "FP16"),  # llama.cpp GGUF: Q4_K_M, Q5_K_M, Q8_0, FP16
+    "batch_size": 1,  # lines per speaker decoded together in one padded generate() (HF backend); 1 keeps the serial path
+    "workers": 1,  # TTS processes sharing the CPU; 1 keeps the single-process path
+    "generation": {},  # outetts.SamplerConfig overrides, e.g. {"temperature": 0.4}
+    "save_line_wavs": False,  # write generated/audios/{key}_{character}.wav for each line
+}
+
+# Cache of synthesized lines (see scripts/tts_cache.py)
+TTS_CACHE = {
+    "dir": "generated/cache/tts",
+    "max_bytes": 2 * 1024 ** 3,
+}
+
+# Cleanup of the generated/runs/<run_id>/ workspaces (see scripts/workspace.py)
+RUN_RETENTION = {
+    "keep_runs": int(os.getenv("KEEP_RUNS", "10")),  # newest runs kept, older ones deleted; 0 keeps all. Keep it above --jobs
+    "delete_uploaded_media": True,  # drop a run's audio and video once both uploads succeeded
+}
+
+# Voiceover server settings (see scripts/tts_server.py)
+TTS_SERVER = {
+    "host": "127.0.0.1",
+    "port": int(os.getenv("TTS_SERVER_PORT", "6123")),
+    "authkey": os.getenv("TTS_SERVER_AUTHKEY"),  # unset: a random per-host key kept in authkey_file
+    "authkey_file": os.path.expanduser("~/.outetts_server_key"),  # readable by its owner only
+    "handshake_timeout": 5,  # seconds to connect and authenticate before falling back to in-process TTS
+    "startup_timeout": 600,  # seconds to wait for the model to load
+}
+
+# Render profiles: output geometry and encoder settings, selected with main.py --profile
+RENDER_PROFILES = {
+    # Fast previews for QA
+    "draft": {
+        "width": 540,
+        "height": 960,
+        "fps": 30,
+        "bitrate": "2000k",
+        "preset": "ultrafast",
+        "crf": 28,
+        "threads": 4,
+    },
+    # What Reels and Shorts actually serve
+    "platform": {
+        "width": 1080,
+        "height": 1920,
+        "fps": 30,
+        "bitrate": "8000k",
+        "preset": "medium",
+        "crf": 20,
+        "threads": 4,
+    },
+    # Full quality master
+    "master": {
+        "width": 1440,
+        "height": 2560,
+        "fps": 60,
+        "bitrate": "16000k",  # High bitrate for quality
+        "preset": "slow",  # Slower encoding for better quality
+        "crf": 18,  # Lower CRF value for higher quality (range 0-51, lower is better)
+        "threads": 4,
+    },
+}
+
+# Video rendering settings
+VIDEO_SETTINGS = {
+    "engine": "moviepy",  # "moviepy" (Python compositing), "ffmpeg" (single filtergraph encode) or "stream" (fixed memory)
+    "segment_workers": int(os.getenv("SEGMENT_WORKERS", "1")),  # >1 renders MoviePy segments per dialogue line in parallel
+    "profile": os.getenv("RENDER_PROFILE", "master"),
+    "speed": 1.1,  # playback speed-up applied to the final video
+    "character_width": 0.45,  # character image width as a fraction of the video width
+    "subtitle_width": 0.8,  # subtitle box width as a fraction of the video width
+    "subtitle_y": 0.25,  # subtitle top edge as a fraction of the video height
+    "sprite_cache_dir": "generated/cache/sprites",  # pre-scaled character images
+    "codec": "libx264",
+    "render_log": "logs/renders.jsonl",  # encode time and size of every render
+}
+VIDEO_SETTINGS.update(RENDER_PROFILES[VIDEO_SETTINGS["profile"]])
+
+
+def set_render_profile(name: str):
+    """
+    Switch VIDEO_SETTINGS to a named render profile. The choice is also
+    exported to the environment so worker processes pick it up on import.
+    """
+    if name not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile: {name} (choose from {', '.join(RENDER_PROFILES)})")
+    os.environ["RENDER_PROFILE"] = name
+    VIDEO_SETTINGS["profile"] = name
+    VIDEO_SETTINGS.update(RENDER_PROFILES[name])
+
+
+# Final voiceover encode: sped up to the video speed and encoded to AAC once, so renders can stream-copy it
+AUDIO_SETTINGS = {
+    "codec": "aac",
+    "bitrate": "192k",
+}
+
+# Gemini calls, all made through scripts/llm_client.py
+LLM_SETTINGS = {
+    "timeout": 60,  # seconds per request
+    "hedge_after": float(os.getenv("LLM_HEDGE_AFTER", "0")),  # >0 sends a duplicate request if the first is still pending after this many seconds
+    "max_workers": 8,  # threads available for concurrent and hedged requests
+}
+
+# Client-side Gemini quota, shared by every call and every --jobs process.
+# The effective rate is scaled down on 429s (AIMD) and recovers on success.
+LLM_RATE_LIMIT = {
+    "requests_per_minute": int(os.getenv("GEMINI_RPM", "10")),
+    "tokens_per_minute": int(os.getenv("GEMINI_TPM", "250000")),
+    "output_tokens": 1024,  # reserved per call for the response until the real usage is known
+    "decrease": 0.5,  # rate multiplier applied on a 429
+    "increase": 0.05,  # rate fraction added back after each successful call
+    "min_scale": 0.1,
+    "max_retries": 6,  # 429s in a row before a call fails
+    "backoff_base": 2.0,  # seconds before the first retry, doubling after that
+    "backoff_max": 60.0,
+    "max_wait": 600,  # longest a call may queue for quota before failing
+    "state_file": "data/llm_rate_limit.json",
+    "log": "logs/llm_calls.jsonl",  # queue wait, tokens and retries of every call
+}
+
+# Instagram accounts for multi-channel uploads; the first one is the default.
+# A password in INSTAGRAM_PASSWORD_<USERNAME> (upper-case) overrides the one here.
+INSTAGRAM_ACCOUNTS = {
+    "fullstackwalter": {
+        "password": "Lk@328001",
+        "session_file": "fullstackwalter_session.json",
+    },
+}
+
+# Logged-in Instagram clients are kept alive and only re-checked after this many seconds
+INSTAGRAM_SESSION = {
+    "revalidate_after": 300,
+}
+
+# Resumable YouTube uploads
+YOUTUBE_UPLOAD = {
+    "chunk_size": 8 * 1024 * 1024,  # bytes per request, a multiple of 256 KiB
+    "max_retries": 8,  # consecutive failed chunks before giving up
+    "backoff_base": 1.0,  # seconds before the first retry, doubling after that
+    "backoff_max": 64.0,
+    "api_endpoint": os.getenv("YOUTUBE_API_ENDPOINT"),  # e.g. a local stand-in server for testing
+}
+
+# Upload variants transcoded from the master render, one per platform (scaled down only, never up)
+PLATFORM_VARIANTS = {
+    # Instagram re-encodes Reels to 1080x1920 at a low bitrate anyway
+    "instagram": {
+        "width": 1080,
+        "fps": 30,
+        "crf": 23,
+        "maxrate": "5M",
+        "bufsize": "10M",
+        "preset": "medium",
+    },
+    # Shorts keep high frame rates, so only the size and bitrate come down
+    "youtube": {
+        "width": 1080,
+        "fps": None,  # keep the master's frame rate
+        "crf": 20,
+        "maxrate": "12M",
+        "bufsize": "24M",
+        "preset": "medium",
+    },
+}
+
+# Cover image shared by the uploaders, grabbed from the rendered video
+COVER_SETTINGS = {
+    "line": 0,  # dialogue line whose midpoint is used, so a character and subtitle are on screen
+    "width": 1080,
+    "quality": 3,  # ffmpeg JPEG quality (2-31, lower is better); keeps the file under YouTube's 2 MB limit
+}
+
+# Background library: backgrounds are transcoded once to 9:16 at the output size and fps
+BACKGROUND_LIBRARY = {
+    "dir": "generated/cache/backgrounds",
+    "keyframe_interval": 1.0,  # seconds between keyframes, so any whole-second offset is a cheap seek
+    "crf": 16,  # near-lossless intermediate
+    "preset": "veryfast",
+    "random_offset": True,  # start each render at a random keyframe instead of 0
+}
+
+# Subtitle rasterization settings
+SUBTITLE_SETTINGS = {
+    # Tried in order; the first font Pillow can load is used
+    "fonts": [os.getenv("SUBTITLE_FONT", "arialbd.ttf"), "Arial Bold.ttf", "DejaVuSans-Bold.ttf"],
+    "font_size": 85,  # Increased font size for higher resolution
+    "stroke_color": "black",
+    "stroke_width": 4,  # Increased stroke width for better visibility
+    "reference_width": 1440,  # video width the sizes above are for; other widths scale them
+    "colors": {
+        CHARACTERS["character1"]["name"]: "white",
+        CHARACTERS["character2"]["name"]: "yellow",
+    },
+    "cache_dir": "generated/cache/subtitles",
+    "workers": 8,
+}
+
 GLOBAL_CONFIG = {
     "YOUTUBE_SETTINGS": YOUTUBE_SETTINGS,
     "CHARACTERS": CHARACTERS,
     "SCRIPT_SETTINGS": SCRIPT_SETTINGS,
+    "TTS_SETTINGS": TTS_SETTINGS,
+    "VIDEO_SETTINGS": VIDEO_SETTINGS,
+    "SUBTITLE_SETTINGS": SUBTITLE_SETTINGS,
 }
\ No newline at end of file
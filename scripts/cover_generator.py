@@ -0,0 +1,51 @@
+"""
+Cover image for the uploaders.
+
+The cover is grabbed from the rendered video with a single keyframe seek
+(no decoding up to the chosen time) at a moment picked from the render
+timeline. It is written next to the video as <video>.jpg, the name
+instagrapi would otherwise generate by decoding the MP4 itself.
+"""
+import subprocess
+from scripts.timeline import load_timeline
+import scripts.config as config
+
+
+def cover_path(video_path: str) -> str:
+    return f"{video_path}.jpg"
+
+
+def cover_time(timeline: dict) -> float:
+    """
+    Output time of the middle of the configured dialogue line.
+    """
+    lines = timeline["lines"]
+    if not lines:
+        return 0.0
+    line = lines[min(config.COVER_SETTINGS["line"], len(lines) - 1)]
+    return (line["start"] + line["end"]) / 2 / timeline.get("speed", 1.0)
+
+
+def generate_cover(video_path: str, audio_path: str) -> str:
+    """
+    Extract the cover frame of a rendered video. audio_path locates the timeline.
+    Returns the path to the JPEG.
+    """
+    output_path = cover_path(video_path)
+    seconds = cover_time(load_timeline(audio_path))
+    settings = config.COVER_SETTINGS
+    try:
+        subprocess.run([
+            config.FFMPEG_BINARY, '-y', '-loglevel', 'error',
+            # Input seek without accurate seeking: land on the nearest keyframe and take it as is
+            '-noaccurate_seek', '-ss', f"{seconds:.3f}", '-i', video_path,
+            '-frames:v', '1',
+            '-vf', f"scale={settings['width']}:-2",
+            '-q:v', str(settings["quality"]),
+            output_path
+        ], check=True)
+    except Exception as e:
+        print(f"Cover generation failed: {str(e)}")
+        raise
+    print(f"Cover saved to {output_path}")
+    return output_path
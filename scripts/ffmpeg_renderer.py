@@ -0,0 +1,125 @@
+"""
+Single-pass ffmpeg render engine.
+
+Turns the voiceover timeline into one ffmpeg filtergraph: the background
+mezzanine is read from a keyframe offset, pre-rendered subtitle PNGs and the
+character images are overlaid with time-window `enable` expressions, and the 1.1x
+speed-up is done with setpts. Everything is encoded in one native ffmpeg run
+instead of compositing frames in Python; the voiceover, already sped up and
+encoded by the voiceover stage, is copied in as is.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+from scripts.background_library import pick_offset, prepare_background
+from scripts.subtitles import render_subtitles
+import scripts.config as config
+
+
+def encoder_args() -> list:
+    """
+    ffmpeg video encoder arguments matching the MoviePy engine's output settings.
+    """
+    settings = config.VIDEO_SETTINGS
+    return [
+        '-c:v', settings["codec"],
+        '-preset', settings["preset"],
+        '-crf', str(settings["crf"]),
+        '-b:v', settings["bitrate"],
+        '-pix_fmt', 'yuv420p',
+        '-threads', str(settings["threads"]),
+    ]
+
+
+def enable_expr(windows: list) -> str:
+    """
+    Overlay `enable` expression that is true inside any of the (start, end) windows.
+    """
+    return '+'.join(f"between(t,{start:.4f},{end:.4f})" for start, end in windows)
+
+
+def build_filtergraph(timeline: dict, subtitle_inputs: list, character_inputs: dict) -> str:
+    """
+    Video filtergraph for background + character images + subtitles + speed-up.
+    subtitle_inputs holds the ffmpeg input index of each line's subtitle PNG,
+    character_inputs maps character name to its image input index.
+    """
+    settings = config.VIDEO_SETTINGS
+    character_w = int(settings["width"] * settings["character_width"])
+    subtitle_y = int(settings["height"] * settings["subtitle_y"])
+    speed = settings["speed"]
+
+    filters = [
+        # The mezzanine is already at output geometry, just trim it to the voiceover
+        f"[0:v]trim=duration={timeline['duration']:.4f},setpts=PTS-STARTPTS[v0]"
+    ]
+    current = "v0"
+    step = 0
+
+    # One overlay per character, enabled for all of that character's lines
+    for index, (name, input_index) in enumerate(character_inputs.items()):
+        windows = [(line["start"], line["end"]) for line in timeline["lines"] if line["speaker"] == name]
+        if not windows:
+            continue
+        x = "0" if index == 0 else "W-w"  # character1 on the left, character2 on the right
+        step += 1
+        filters.append(f"[{input_index}:v]scale={character_w}:-1[char{index}]")
+        filters.append(f"[{current}][char{index}]overlay=x={x}:y=H-h:enable='{enable_expr(windows)}'[v{step}]")
+        current = f"v{step}"
+
+    # One overlay per subtitle, enabled during its line
+    for line, input_index in zip(timeline["lines"], subtitle_inputs):
+        step += 1
+        filters.append(
+            f"[{current}][{input_index}:v]overlay=x=(W-w)/2:y={subtitle_y}:"
+            f"enable='{enable_expr([(line['start'], line['end'])])}'[v{step}]"
+        )
+        current = f"v{step}"
+
+    filters.append(f"[{current}]setpts=PTS/{speed},fps={settings['fps']}[vout]")
+    return ";\n".join(filters)
+
+
+def render_ffmpeg(timeline: dict, audio_file: str, output_path: str) -> str:
+    """
+    Render the final video with a single ffmpeg invocation.
+    """
+    background = prepare_background()
+    offset = pick_offset(background, timeline["duration"])
+    work_dir = tempfile.mkdtemp(prefix='render-', dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        # Inputs: 0 background, 1 voiceover, then character images, then subtitles
+        # Input seeking lands on a keyframe, so only the needed frames are decoded
+        inputs = [
+            '-ss', f"{offset:.3f}", '-t', f"{timeline['duration']:.3f}", '-i', background["path"],
+            '-i', audio_file
+        ]
+        character_inputs = {}
+        for character in config.CHARACTERS.values():
+            character_inputs[character["name"]] = 2 + len(character_inputs)
+            inputs += ['-i', character["image_path"]]
+
+        subtitle_inputs = []
+        for index, png_path in enumerate(render_subtitles(timeline["lines"], config.VIDEO_SETTINGS["width"])):
+            subtitle_inputs.append(2 + len(character_inputs) + index)
+            inputs += ['-i', png_path]
+
+        # Long scripts make long graphs, so pass it as a file rather than on the command line
+        graph_path = os.path.join(work_dir, 'filtergraph.txt')
+        with open(graph_path, 'w') as f:
+            f.write(build_filtergraph(timeline, subtitle_inputs, character_inputs))
+
+        subprocess.run([
+            config.FFMPEG_BINARY, '-y', '-loglevel', 'error',
+            *inputs,
+            '-filter_complex_script', graph_path,
+            '-map', '[vout]', '-map', '1:a',
+            *encoder_args(),
+            '-c:a', 'copy',
+            '-shortest',
+            output_path
+        ], check=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return output_path
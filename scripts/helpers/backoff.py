@@ -0,0 +1,9 @@
+import random
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Exponential backoff with jitter for the given retry attempt (1-based):
+    base * 2^(attempt-1) seconds capped at cap, scaled down by up to half at random.
+    """
+    return min(cap, base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
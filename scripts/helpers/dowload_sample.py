@@ -1,9 +1,11 @@
 import os
 from pytube import YouTube
 
+SAMPLE_VIDEO_PATH = 'samples/video/video.mp4'
+
 def download_sample_video(youtube_url):
     # Check if video already exists
-    video_path = 'samples/video/video.mp4'
+    video_path = SAMPLE_VIDEO_PATH
     if os.path.exists(video_path):
         print("Sample video already exists, skipping download")
         return
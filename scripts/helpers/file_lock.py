@@ -0,0 +1,38 @@
+import contextlib
+import os
+import time
+
+
+@contextlib.contextmanager
+def file_lock(path: str, timeout: float = 600, stale_after: float = 900):
+    """
+    Cross-process lock around a shared file, held via an exclusive '<path>.lock' file.
+    Works on Windows and POSIX. A lock older than stale_after seconds is assumed
+    to belong to a crashed process and is taken over.
+    """
+    lock_path = f"{path}.lock"
+    deadline = time.time() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > stale_after:
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"Timed out waiting for lock on {path}")
+            time.sleep(0.1)
+
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
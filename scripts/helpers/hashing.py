@@ -0,0 +1,21 @@
+import functools
+import hashlib
+import os
+
+
+def file_sha256(path: str) -> str:
+    """
+    SHA-256 of a file's contents. Each file is hashed once per process and
+    hashed again only if its size or modification time changes.
+    """
+    stat = os.stat(path)
+    return _file_sha256(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=1024)
+def _file_sha256(path: str, size: int, mtime_ns: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
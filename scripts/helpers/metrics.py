@@ -0,0 +1,153 @@
+import os
+import sys
+import threading
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of the current process in MB, or None where
+    the platform doesn't expose it (the resource module is POSIX only).
+    This is the peak over the whole life of the process.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    return _maxrss_mb(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def children_peak_rss_mb():
+    """
+    Peak RSS in MB of the largest child process that has exited and been waited for, or None.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    return _maxrss_mb(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+
+def _maxrss_mb(rss):
+    # ru_maxrss is reported in bytes on macOS and in KiB elsewhere
+    if sys.platform == "darwin":
+        rss /= 1024
+    return rss / 1024
+
+
+def _status_mb(pid, field: str):
+    """
+    A memory field (VmRSS, VmHWM) of /proc/<pid>/status in MB, or None.
+    """
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def _descendants(pid: int) -> list:
+    """
+    All live descendant process ids of pid, from /proc.
+    """
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                # The command name may contain spaces, so split after its closing parenthesis
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    found, stack = [], [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+class MemorySampler:
+    """
+    Peak memory of a block of work, for this process and the processes it
+    starts (ffmpeg, worker pools):
+
+        with MemorySampler() as memory:
+            render()
+        memory.peaks()
+
+    On Linux the process's own peak counter is reset on entry and the RSS of
+    all descendants is sampled while the block runs. Children that exit
+    between samples are still caught by RUSAGE_CHILDREN, if they set a new
+    high for this process. Elsewhere the values are None.
+    """
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.pid = os.getpid()
+        self.has_proc = os.path.exists(f"/proc/{self.pid}/status")
+        self.process_mb = 0.0
+        self.children_mb = 0.0
+        self.total_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _reset_peak(self) -> bool:
+        # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux 4.0+)
+        try:
+            with open("/proc/self/clear_refs", 'w') as f:
+                f.write("5")
+            return True
+        except OSError:
+            return False
+
+    def _sample(self):
+        process = _status_mb(self.pid, "VmRSS") or 0.0
+        children = sum(_status_mb(pid, "VmRSS") or 0.0 for pid in _descendants(self.pid))
+        self.process_mb = max(self.process_mb, process)
+        self.children_mb = max(self.children_mb, children)
+        self.total_mb = max(self.total_mb, process + children)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.children_before = children_peak_rss_mb()
+        if self.has_proc:
+            self.hwm_reset = self._reset_peak()
+            self._sample()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+            if self.hwm_reset:
+                # The kernel's counter also sees spikes between samples
+                self.process_mb = max(self.process_mb, _status_mb(self.pid, "VmHWM") or 0.0)
+        children_after = children_peak_rss_mb()
+        if children_after is not None and children_after > self.children_before:
+            self.children_mb = max(self.children_mb, children_after)
+        self.total_mb = max(self.total_mb, self.process_mb, self.children_mb)
+        return False
+
+    def peaks(self) -> dict:
+        """
+        Peak RSS in MB during the block: this process, its children together, and both together.
+        """
+        if not self.has_proc:
+            return {"process_mb": None, "children_mb": self.children_mb or None, "total_mb": None}
+        return {
+            "process_mb": round(self.process_mb, 1),
+            "children_mb": round(self.children_mb, 1),
+            "total_mb": round(self.total_mb, 1),
+        }
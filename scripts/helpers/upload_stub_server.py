@@ -0,0 +1,223 @@
+"""
+Local stand-in for the YouTube resumable upload endpoint.
+
+Serves the upload protocol googleapiclient speaks (session POST, chunk PUTs
+answered with 308 + Range, "bytes */N" status queries) from memory, and can
+be told to fail chunks on purpose: "503" answers 503, "drop" keeps the chunk
+but resets the connection without answering, "404" forgets the session.
+
+    python -m scripts.helpers.upload_stub_server          # serve; set YOUTUBE_API_ENDPOINT to the printed URL
+    python -m scripts.helpers.upload_stub_server --check  # run execute_resumable through every fault
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import struct
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class UploadStub:
+    """
+    In-memory resumable upload server. faults is consumed one entry per chunk
+    PUT ("ok", "503", "drop", "404"); once it is empty every chunk succeeds.
+    """
+
+    def __init__(self, faults: list = None, port: int = 0):
+        self.faults = list(faults or [])
+        self.sessions = {}  # session id -> bytes received
+        self.chunk_offsets = {}  # session id -> start offset of every chunk PUT
+        self.errors = []  # protocol violations by the client
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.thread = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def session_url(self, session_id: int) -> str:
+        return f"{self.endpoint}upload/session/{session_id}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, headers: dict = None, body: dict = None):
+                content = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def _read_body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def _progress(self, session_id: int, total: int):
+                received = len(stub.sessions[session_id])
+                if received == total:
+                    self._reply(200, body={"kind": "youtube#video", "id": f"stub-{session_id}"})
+                elif received:
+                    self._reply(308, {"Range": f"bytes=0-{received - 1}"})
+                else:
+                    self._reply(308)
+
+            def do_POST(self):
+                # Any POST starts a new upload session
+                self._read_body()
+                with stub.lock:
+                    session_id = len(stub.chunk_offsets) + 1
+                    stub.sessions[session_id] = bytearray()
+                    stub.chunk_offsets[session_id] = []
+                self._reply(200, {"Location": stub.session_url(session_id)})
+
+            def do_PUT(self):
+                data = self._read_body()
+                match = re.fullmatch(r"/upload/session/(\d+)", self.path)
+                session_id = int(match.group(1)) if match else None
+                content_range = self.headers.get("Content-Range", "")
+                with stub.lock:
+                    if session_id not in stub.sessions:
+                        self._reply(404, body={"error": {"code": 404, "message": "Upload session not found"}})
+                        return
+
+                    status_query = re.fullmatch(r"bytes \*/(\d+)", content_range)
+                    if status_query:
+                        self._progress(session_id, int(status_query.group(1)))
+                        return
+
+                    chunk = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+)", content_range)
+                    if not chunk:
+                        self._reply(400, body={"error": {"code": 400, "message": f"Bad Content-Range: {content_range}"}})
+                        return
+                    start, total = int(chunk.group(1)), int(chunk.group(3))
+                    received = stub.sessions[session_id]
+                    stub.chunk_offsets[session_id].append(start)
+                    fault = stub.faults.pop(0) if stub.faults else "ok"
+
+                    if fault == "503":
+                        self._reply(503, body={"error": {"code": 503, "message": "Backend unavailable"}})
+                        return
+                    if fault == "404":
+                        del stub.sessions[session_id]
+                        self._reply(404, body={"error": {"code": 404, "message": "Upload session expired"}})
+                        return
+
+                    if start != len(received):
+                        stub.errors.append(f"session {session_id}: chunk sent at byte {start}, server had {len(received)}")
+                    else:
+                        received.extend(data)
+
+                    if fault == "drop":
+                        # The chunk arrived but the answer is lost: reset the connection. A clean
+                        # close would make httplib2 resend the request with an already-read body.
+                        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+                        self.connection.close()
+                        self.close_connection = True
+                        return
+                    self._progress(session_id, total)
+
+        return Handler
+
+
+def run_check(chunk_size: int = 256 * 1024):
+    """
+    Upload a file through the stub with a 503, a dropped connection, a crash
+    and an expired session, and check the saved session and every resume point.
+    """
+    from googleapiclient.discovery import build
+    from googleapiclient.http import MediaFileUpload, build_http
+    from scripts.resumable_upload import execute_resumable, session_path, with_endpoint
+    import scripts.config as config
+
+    config.YOUTUBE_UPLOAD.update(backoff_base=0.01, backoff_max=0.05)
+
+    data = os.urandom(4 * chunk_size + 1000)
+    stub = UploadStub(faults=["ok", "503", "drop", "ok"]).start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            video_path = os.path.join(tmp_dir, "video.mp4")
+            with open(video_path, 'wb') as f:
+                f.write(data)
+            # build_http() is what authorized clients use; it keeps 308 from being followed as a redirect
+            youtube = build('youtube', 'v3', http=build_http(), client_options={"api_endpoint": stub.endpoint},
+                            static_discovery=True)
+
+            def make_request():
+                media = MediaFileUpload(video_path, mimetype='video/mp4', chunksize=chunk_size, resumable=True)
+                request = youtube.videos().insert(part='snippet,status', body={'snippet': {'title': 'stub'}}, media_body=media)
+                return with_endpoint(request, stub.endpoint)
+
+            class Crash(Exception):
+                pass
+
+            def crash_after_three_chunks(uploaded, total):
+                if uploaded >= 3 * chunk_size:
+                    raise Crash()
+
+            # Run 1: 503 on chunk 2, dropped answer on its retry, then the process "crashes"
+            try:
+                execute_resumable(make_request(), video_path, on_progress=crash_after_three_chunks)
+                raise AssertionError("upload should have been interrupted")
+            except Crash:
+                pass
+            with open(session_path(video_path), 'r') as f:
+                saved = json.load(f)
+            assert saved["resumable_uri"] == stub.session_url(1), saved
+            assert stub.sessions[1] == data[:3 * chunk_size]
+            print(f"Interrupted after {len(stub.sessions[1])} bytes, session saved to {session_path(video_path)}")
+
+            # Run 2: resumes the saved session, which then expires (404) and is restarted
+            stub.faults = ["404"]
+            response = execute_resumable(make_request(), video_path)
+
+            c = chunk_size
+            assert stub.chunk_offsets[1] == [0, c, c, 2 * c, 3 * c], stub.chunk_offsets[1]
+            assert stub.chunk_offsets[2] == [0, c, 2 * c, 3 * c, 4 * c], stub.chunk_offsets[2]
+            assert not stub.errors, stub.errors
+            assert response["id"] == "stub-2", response
+            assert stub.sessions[2] == data
+            assert not os.path.exists(session_path(video_path))
+    finally:
+        stub.stop()
+    print("Resumable upload check passed: resumed from every acknowledged byte, session file saved and cleared")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--check", action="store_true", help="Run execute_resumable against the stub and exit")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--faults", nargs="*", default=[], help="Faults for the first chunks: ok, 503, drop, 404")
+    args = parser.parse_args()
+
+    if args.check:
+        run_check()
+        return
+    stub = UploadStub(args.faults, port=args.port)
+    print(f"Upload stub listening; set YOUTUBE_API_ENDPOINT={stub.endpoint}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Pool of authenticated Instagram clients.
+
+Clients are created once per account and kept alive for the life of the
+process, so consecutive launcher.py iterations reuse them. A saved session
+is validated with one cheap authenticated call instead of a full login,
+and the account only logs in again when Instagram rejects the session or the
+saved session can't be read.
+"""
+import os
+import threading
+import time
+from instagrapi import Client
+from instagrapi.exceptions import ClientLoginRequired, LoginRequired
+from scripts.helpers.file_lock import file_lock
+import scripts.config as config
+
+# Instagram no longer accepts the saved session. Throttling (ClientThrottledError,
+# PleaseWaitFewMinutes) and network errors are ClientErrors too, but logging in again
+# while rate limited only makes it worse, so those are left to the caller.
+SESSION_EXPIRED = (LoginRequired, ClientLoginRequired)
+# The saved session is incomplete or corrupt, so the account info can't be read back
+SESSION_DATA_ERRORS = (KeyError, TypeError, ValueError)
+
+
+class InstagramSessionPool:
+    """
+    Logged-in instagrapi clients keyed by username (see INSTAGRAM_ACCOUNTS).
+    """
+
+    def __init__(self, accounts: dict = None):
+        self.accounts = accounts or config.INSTAGRAM_ACCOUNTS
+        self.clients = {}
+        self.validated_at = {}
+        self.locks = {username: threading.Lock() for username in self.accounts}
+
+    def default_account(self) -> str:
+        return next(iter(self.accounts))
+
+    def password(self, username: str) -> str:
+        return os.getenv(f"INSTAGRAM_PASSWORD_{username.upper()}") or self.accounts[username]["password"]
+
+    def get(self, username: str = None) -> Client:
+        """
+        A logged-in client for username (the default account if omitted).
+        """
+        username = username or self.default_account()
+        if username not in self.accounts:
+            raise ValueError(f"Unknown Instagram account: {username}")
+
+        with self.locks[username]:
+            client = self.clients.get(username)
+            fresh = time.time() - self.validated_at.get(username, 0) < config.INSTAGRAM_SESSION["revalidate_after"]
+            if client is not None and fresh:
+                return client
+
+            # Concurrent runs share the session file
+            with file_lock(self.accounts[username]["session_file"]):
+                if client is None:
+                    client = self._load(username)
+                if not self._is_valid(client):
+                    self._relogin(username, client)
+            self.clients[username] = client
+            self.validated_at[username] = time.time()
+            return client
+
+    def invalidate(self, username: str = None):
+        """
+        Force the next get() to re-check the session, e.g. after a LoginRequired during an upload.
+        """
+        self.validated_at.pop(username or self.default_account(), None)
+
+    def _load(self, username: str) -> Client:
+        """
+        A client with the saved session loaded, or freshly logged in if there is none
+        or it can't be read.
+        """
+        client = Client()
+        session_file = self.accounts[username]["session_file"]
+        if os.path.exists(session_file):
+            try:
+                client.load_settings(session_file)
+                print(f"✅ Loaded saved Instagram session for {username}.")
+                return client
+            except Exception as e:
+                print(f"⚠️ Failed to load saved Instagram session for {username}: {str(e)}")
+                client = Client()
+        self._relogin(username, client)
+        return client
+
+    def _is_valid(self, client: Client) -> bool:
+        """
+        One cheap authenticated request instead of a full login. False only if the
+        session has expired or its data is unusable; other errors are raised.
+        """
+        try:
+            client.account_info()
+            return True
+        except SESSION_EXPIRED as e:
+            print(f"⚠️ Saved Instagram session expired: {str(e)}")
+            return False
+        except SESSION_DATA_ERRORS as e:
+            print(f"⚠️ Saved Instagram session data is unusable: {str(e)}")
+            return False
+
+    def _relogin(self, username: str, client: Client):
+        """
+        Log in from scratch, keeping the device ids (if any) so Instagram sees the same device.
+        """
+        print(f"⚠️ No valid Instagram session for {username}. Logging in...")
+        uuids = client.get_settings().get("uuids")
+        client.set_settings({})
+        if uuids:
+            client.set_uuids(uuids)
+        client.login(username, self.password(username))
+        client.dump_settings(self.accounts[username]["session_file"])
+        print(f"✅ Logged in as {username} and saved new session.")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> InstagramSessionPool:
+    """
+    The process-wide session pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = InstagramSessionPool()
+        return _pool
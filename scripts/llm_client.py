@@ -0,0 +1,110 @@
+"""
+Single entry point for Gemini calls.
+
+One genai.Client is created on first use and shared by every caller, so all
+requests go over the same pooled HTTP connections instead of paying a new
+TLS handshake each time. Importing this module needs no API key; the key
+and model are only checked on the first call. Requests time out after
+LLM_SETTINGS["timeout"] seconds and can optionally be hedged: if a request is
+still pending after LLM_SETTINGS["hedge_after"] seconds, a duplicate is sent
+and whichever answers first wins. Every request goes through the shared
+rate limiter (see scripts/rate_limiter.py).
+"""
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from google import genai
+from google.genai import errors, types
+from scripts.rate_limiter import RateLimited, get_rate_limiter
+import scripts.config as config
+
+_client = None
+_executor = None
+_lock = threading.Lock()
+
+
+def model_name() -> str:
+    model = os.getenv('GEMINI_MODEL')
+    if not model:
+        raise ValueError("GEMINI_MODEL not set")
+    return model
+
+
+def get_client() -> genai.Client:
+    """
+    The shared Gemini client, created on first use.
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            api_key = os.getenv('GEMINI_API_KEY')
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY not set")
+            try:
+                _client = genai.Client(
+                    api_key=api_key,
+                    # HttpOptions takes the timeout in milliseconds
+                    http_options=types.HttpOptions(timeout=int(config.LLM_SETTINGS["timeout"] * 1000))
+                )
+            except Exception as e:
+                print(f"Gemini client failed: {str(e)}")
+                raise
+        return _client
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=config.LLM_SETTINGS["max_workers"], thread_name_prefix="llm")
+        return _executor
+
+
+def _request(prompt: str, model: str):
+    """
+    One generate_content call. Returns the text and the tokens it used.
+    """
+    try:
+        response = get_client().models.generate_content(model=model, contents=prompt)
+    except errors.APIError as e:
+        if e.code == 429:
+            raise RateLimited(str(e)) from e
+        raise
+    usage = getattr(response, "usage_metadata", None)
+    return response.text, getattr(usage, "total_token_count", None)
+
+
+def _generate_once(prompt: str, model: str) -> str:
+    # Every request, hedged duplicates included, is paid for from the shared quota
+    return get_rate_limiter().call(lambda: _request(prompt, model), prompt)
+
+
+def generate(prompt: str, model: str = None, hedge_after: float = None) -> str:
+    """
+    Send one prompt to Gemini and return the response text.
+    hedge_after overrides LLM_SETTINGS["hedge_after"]; 0 disables hedging.
+    """
+    model = model or model_name()
+    hedge_after = config.LLM_SETTINGS["hedge_after"] if hedge_after is None else hedge_after
+    if not hedge_after:
+        return _generate_once(prompt, model)
+
+    executor = _get_executor()
+    pending = {executor.submit(_generate_once, prompt, model)}
+    done, pending = wait(pending, timeout=hedge_after)
+    if not done:
+        pending.add(executor.submit(_generate_once, prompt, model))
+
+    # The first request to succeed wins; only fail once every attempt has failed
+    error = None
+    while pending or done:
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return future.result()
+            error = future.exception()
+        if not pending:
+            break
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+    raise error
@@ -0,0 +1,56 @@
+"""
+Streaming voiceover -> video pipeline.
+
+Each dialogue line's video segment starts rendering in a separate worker
+process as soon as its audio (and so its position in the timeline) is known,
+while TTS carries on with the next lines. The segments are joined at the end
+without re-encoding, so end-to-end time approaches max(TTS, render) instead
+of their sum.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from scripts.background_library import prepare_background
+from scripts.error_handler import handle_errors, logging
+from scripts.helpers.metrics import MemorySampler
+from scripts.video_generator import concat_segments, log_render, render_segment
+from scripts.voiceover_generator import generate_voiceover
+
+
+@handle_errors("Pipeline")
+def generate_voiceover_and_video(script_path: str = 'generated/scripts/generated_script.json',
+                                 audios_path: str = 'generated/audios',
+                                 segments_dir: str = 'generated/videos/segments',
+                                 output_path: str = 'final_video.mp4',
+                                 render_workers: int = 1) -> tuple:
+    """
+    Run the voiceover and video stages overlapped.
+    Returns (audio_path, video_path).
+    """
+    os.makedirs(segments_dir, exist_ok=True)
+    for file in os.listdir(segments_dir):
+        os.remove(os.path.join(segments_dir, file))
+
+    start = time.perf_counter()
+
+    # Memory here includes the in-process TTS model, if no TTS server is running
+    with MemorySampler() as memory:
+        # Prepare the background once up front rather than in every worker. The total
+        # duration isn't known until TTS finishes, so segments read it from the start.
+        background = prepare_background()
+
+        segments = []
+        with ProcessPoolExecutor(max_workers=render_workers) as executor:
+            def on_line_ready(line):
+                segment_path = os.path.join(segments_dir, f"{int(line['key']):04d}.mp4")
+                segments.append(executor.submit(render_segment, line, segment_path, background))
+                logging.info(f"Queued video segment for line {line['key']}")
+
+            audio_file = generate_voiceover(script_path, audios_path, on_line_ready=on_line_ready)
+            segment_paths = [segment.result() for segment in segments]
+
+        video_file = concat_segments(segment_paths, audio_file, output_path)
+    # Wall time here includes the overlapped TTS
+    log_render(video_file, "pipeline", time.perf_counter() - start, memory.peaks())
+    logging.info(f"Joined {len(segment_paths)} segments into {video_file}")
+    return audio_file, video_file
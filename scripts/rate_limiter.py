@@ -0,0 +1,232 @@
+"""
+Client-side rate limiting for Gemini calls.
+
+Two token buckets, one for requests and one for tokens per minute, are kept in
+a small state file under a file lock, so every thread and every --jobs
+process draws from the same budget. A call reserves one request and an
+estimate of its tokens before it is sent and settles the estimate against
+the real usage afterwards. Callers that find the buckets empty queue until
+enough budget has refilled instead of hitting the API.
+
+The refill rate adapts AIMD-style: a 429 cuts it by LLM_RATE_LIMIT["decrease"]
+for everyone, and each successful call adds LLM_RATE_LIMIT["increase"] back
+up to the configured limits. Queue wait, retries and token usage of every
+call are appended to LLM_RATE_LIMIT["log"].
+"""
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from scripts.helpers.backoff import backoff_delay
+from scripts.helpers.file_lock import file_lock
+import scripts.config as config
+
+
+class RateLimited(Exception):
+    """
+    Raised by the wrapped call when the API answers 429.
+    """
+
+
+def estimate_tokens(prompt: str) -> int:
+    """
+    Rough token count of a prompt plus the response budget (about 4 characters per token).
+    """
+    return len(prompt) // 4 + config.LLM_RATE_LIMIT["output_tokens"]
+
+
+class RateLimiter:
+    """
+    Shared request and token buckets backed by LLM_RATE_LIMIT["state_file"].
+    """
+
+    def __init__(self, settings: dict = None):
+        self.settings = settings or config.LLM_RATE_LIMIT
+        self.state_file = self.settings["state_file"]
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.stats = {"requests": 0, "throttled": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "max_queued": 0}
+
+    def _limits(self) -> dict:
+        return {"requests": self.settings["requests_per_minute"], "tokens": self.settings["tokens_per_minute"]}
+
+    def _load(self) -> dict:
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        limits = self._limits()
+        return {"requests": limits["requests"], "tokens": limits["tokens"], "scale": 1.0, "updated": time.time()}
+
+    def _save(self, state: dict):
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_file)
+
+    def _refill(self, state: dict) -> dict:
+        """
+        Top the buckets up for the time elapsed since the last update, at the scaled rate.
+        """
+        now = time.time()
+        elapsed = max(0.0, now - state["updated"])
+        for bucket, limit in self._limits().items():
+            capacity = limit * state["scale"]
+            state[bucket] = min(capacity, state[bucket] + elapsed * capacity / 60)
+        state["updated"] = now
+        return state
+
+    def _update(self, change):
+        """
+        Apply change(state) to the shared state under the file lock and return its result.
+        """
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        with file_lock(self.state_file, timeout=60):
+            state = self._refill(self._load())
+            result = change(state)
+            self._save(state)
+        return result
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Block until one request and `tokens` tokens are available, and take them.
+        Returns the seconds spent queued.
+        """
+        limits = self._limits()
+        start = time.time()
+        with self._lock:
+            self.queued += 1
+            self.stats["max_queued"] = max(self.stats["max_queued"], self.queued)
+        try:
+            while True:
+                def take(state):
+                    # A call larger than the bucket could never fit, so it only waits for a full bucket
+                    needed = min(tokens, limits["tokens"] * state["scale"])
+                    if state["requests"] >= 1 and state["tokens"] >= needed:
+                        state["requests"] -= 1
+                        state["tokens"] -= tokens
+                        return 0.0
+                    # Time until both buckets have refilled enough
+                    per_second = state["scale"] / 60
+                    return max((1 - state["requests"]) / (limits["requests"] * per_second),
+                               (needed - state["tokens"]) / (limits["tokens"] * per_second))
+
+                wait = self._update(take)
+                if wait <= 0:
+                    break
+                if time.time() - start + wait > self.settings["max_wait"]:
+                    raise TimeoutError(f"Gemini quota still exhausted after {time.time() - start:.0f}s in the queue")
+                # Re-check at least once a second; other processes may settle unused tokens
+                time.sleep(min(wait, 1.0) + random.uniform(0, 0.1))
+        finally:
+            with self._lock:
+                self.queued -= 1
+
+        waited = time.time() - start
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["wait_seconds"] += waited
+            self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], waited)
+        return waited
+
+    def settle(self, reserved: int, used: int):
+        """
+        Correct the token bucket once a call's real usage is known and grow the rate back.
+        """
+        increase, limits = self.settings["increase"], self._limits()
+
+        def change(state):
+            state["tokens"] += reserved - used
+            state["scale"] = min(1.0, state["scale"] + increase)
+            state["tokens"] = min(state["tokens"], limits["tokens"] * state["scale"])
+
+        self._update(change)
+
+    def throttled(self, reserved: int):
+        """
+        The API answered 429: cut the shared rate and drain the buckets so every caller backs off.
+        """
+        decrease, min_scale = self.settings["decrease"], self.settings["min_scale"]
+
+        def change(state):
+            state["scale"] = max(min_scale, state["scale"] * decrease)
+            state["requests"] = 0.0
+            state["tokens"] = min(state["tokens"] + reserved, 0.0)
+            return state["scale"]
+
+        scale = self._update(change)
+        with self._lock:
+            self.stats["throttled"] += 1
+        print(f"Gemini rate limited, cutting the request rate to {scale:.0%} of the limit")
+
+    def metrics(self) -> dict:
+        """
+        Queueing metrics of this process so far.
+        """
+        with self._lock:
+            stats = dict(self.stats, queued=self.queued)
+        stats["avg_wait_seconds"] = stats["wait_seconds"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+    def log_call(self, waited: float, tokens: int, retries: int, status: str):
+        log_path = self.settings["log"]
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, 'a') as f:
+            f.write(json.dumps({
+                "pid": os.getpid(),
+                "wait_seconds": round(waited, 3),
+                "tokens": tokens,
+                "retries": retries,
+                "status": status,
+                "queued": self.queued,
+                "finished_at": datetime.now().isoformat(timespec='seconds'),
+            }) + "\n")
+
+    def call(self, fn, prompt: str):
+        """
+        Run fn() within the budget, where fn returns (result, tokens used or None)
+        and raises RateLimited on a 429. 429s are retried with backoff.
+        """
+        reserved = estimate_tokens(prompt)
+        waited = 0.0
+        attempt = 0
+        while True:
+            waited += self.acquire(reserved)
+            try:
+                result, used = fn()
+            except RateLimited as e:
+                self.throttled(reserved)
+                attempt += 1
+                if attempt > self.settings["max_retries"]:
+                    self.log_call(waited, reserved, attempt - 1, "rate limited")
+                    raise RuntimeError(f"Gemini still rate limited after {attempt - 1} retries") from e
+                delay = backoff_delay(attempt, self.settings["backoff_base"], self.settings["backoff_max"])
+                time.sleep(delay)
+                waited += delay
+                continue
+            except Exception:
+                self.log_call(waited, reserved, attempt, "failed")
+                raise
+            used = used if used is not None else reserved
+            self.settle(reserved, used)
+            self.log_call(waited, used, attempt, "ok")
+            return result
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    The process-wide rate limiter; its budget is shared with other processes through the state file.
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
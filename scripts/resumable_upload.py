@@ -0,0 +1,136 @@
+"""
+Chunked, resumable media uploads for googleapiclient requests.
+
+The upload is driven chunk by chunk with next_chunk(). 5xx responses and
+network errors are retried with exponential backoff, and after an error the
+server is asked for the last acknowledged byte before continuing. The
+upload session URI is persisted next to the media file, so a restarted run
+picks up the same session instead of sending the whole file again.
+
+Works with any HttpRequest built with a resumable MediaUpload, so it can be
+exercised against a local stand-in server (see YOUTUBE_UPLOAD["api_endpoint"]
+and scripts/helpers/upload_stub_server.py).
+"""
+import http.client
+import json
+import os
+import socket
+import time
+import urllib.parse
+import httplib2
+from googleapiclient.errors import HttpError
+from scripts.error_handler import logging
+from scripts.helpers.backoff import backoff_delay
+from scripts.helpers.hashing import file_sha256
+import scripts.config as config
+
+RETRIABLE_STATUS = {500, 502, 503, 504}
+RETRIABLE_EXCEPTIONS = (httplib2.HttpLib2Error, http.client.HTTPException, ConnectionError, socket.timeout, TimeoutError)
+# The session has expired or is unknown to the server: start a new one
+EXPIRED_STATUS = {404, 410}
+
+
+def with_endpoint(request, api_endpoint: str):
+    """
+    Point a media upload request at api_endpoint. googleapiclient only swaps
+    the host of upload URLs for an overridden endpoint and keeps https, which
+    a plain-http stand-in server can't answer.
+    """
+    if api_endpoint:
+        endpoint = urllib.parse.urlparse(api_endpoint)
+        request.uri = urllib.parse.urlparse(request.uri)._replace(scheme=endpoint.scheme, netloc=endpoint.netloc).geturl()
+    return request
+
+
+def session_path(media_path: str) -> str:
+    return f"{media_path}.upload.json"
+
+
+def load_session(media_path: str):
+    """
+    Saved session URI for media_path, or None if there is none or the file changed since.
+    """
+    path = session_path(media_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        session = json.load(f)
+    if session.get("sha256") != file_sha256(media_path):
+        os.remove(path)
+        return None
+    return session["resumable_uri"]
+
+
+def save_session(media_path: str, resumable_uri: str):
+    path = session_path(media_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"resumable_uri": resumable_uri, "sha256": file_sha256(media_path)}, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def clear_session(media_path: str):
+    try:
+        os.remove(session_path(media_path))
+    except FileNotFoundError:
+        pass
+
+
+def log_progress(uploaded: int, total: int):
+    logging.info(f"Uploaded {uploaded / (1024 * 1024):.1f}/{total / (1024 * 1024):.1f} MB ({uploaded / total:.0%})")
+
+
+def execute_resumable(request, media_path: str, on_progress=log_progress):
+    """
+    Run a resumable upload request to completion and return the API response.
+    on_progress(uploaded_bytes, total_bytes) is called after every chunk.
+    """
+    resumed = load_session(media_path)
+    if resumed:
+        logging.info(f"Resuming upload session for {media_path}")
+        request.resumable_uri = resumed
+        # Makes the next call ask the server how far the upload got
+        request._in_error_state = True
+
+    saved_uri = resumed
+    attempt = 0
+    response = None
+    while response is None:
+        error = None
+        try:
+            status, response = request.next_chunk()
+            if status:
+                on_progress(status.resumable_progress, status.total_size)
+            attempt = 0
+        except HttpError as e:
+            if e.resp.status in EXPIRED_STATUS and request.resumable_uri:
+                logging.warning(f"Upload session expired ({e.resp.status}), starting a new one")
+                clear_session(media_path)
+                request.resumable_uri = None
+                request.resumable_progress = 0
+                request._in_error_state = False
+                saved_uri = None
+                continue
+            if e.resp.status not in RETRIABLE_STATUS:
+                raise
+            error = e
+        except RETRIABLE_EXCEPTIONS as e:
+            error = e
+
+        # Persist the session as soon as the server has handed one out
+        if request.resumable_uri and request.resumable_uri != saved_uri:
+            save_session(media_path, request.resumable_uri)
+            saved_uri = request.resumable_uri
+
+        if error is not None:
+            attempt += 1
+            if attempt > config.YOUTUBE_UPLOAD["max_retries"]:
+                raise error
+            delay = backoff_delay(attempt, config.YOUTUBE_UPLOAD["backoff_base"], config.YOUTUBE_UPLOAD["backoff_max"])
+            logging.warning(f"Upload error ({error}), retry {attempt} in {delay:.1f}s")
+            time.sleep(delay)
+            if request.resumable_uri:
+                request._in_error_state = True
+
+    clear_session(media_path)
+    return response
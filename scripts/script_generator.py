@@ -1,23 +1,9 @@
-from google import genai
 import os
 import json
 from pathlib import Path
 
 from scripts.config import *
-
-# Configure Gemini API
-GOOGLE_API_KEY = os.getenv('GEMINI_API_KEY')
-GEMINI_MODEL = os.getenv('GEMINI_MODEL')
-if not GOOGLE_API_KEY:
-    raise ValueError("GEMINI_API_KEY not set")
-if not GEMINI_MODEL:
-    raise ValueError("GEMINI_MODEL not set")
-
-try:
-    client = genai.Client(api_key=GOOGLE_API_KEY)
-except Exception as e:
-    print(f"Gemini client failed: {str(e)}")
-    raise
+from scripts.llm_client import generate
 
 
 def generate_script(topic: str) -> dict:
@@ -49,23 +35,20 @@ def generate_script(topic: str) -> dict:
     """
     
     try:
-        response = client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=prompt
-        )
+        text = generate(prompt)
         
         # Try to parse the response as JSON
         try:
-            script = json.loads(response.text)
+            script = json.loads(text)
         except json.JSONDecodeError:
             # If JSON parsing fails, try to clean the response
-            cleaned_text = response.text.strip()
+            cleaned_text = text.strip()
             # Remove any markdown code block markers
             cleaned_text = cleaned_text.replace('```json', '').replace('```', '').strip()
             try:
                 script = json.loads(cleaned_text)
             except json.JSONDecodeError as e:
-                print(f"Invalid JSON response: {response.text}")
+                print(f"Invalid JSON response: {text}")
                 raise ValueError(f"Failed to parse script as JSON: {str(e)}")
         
         # Validate script structure
@@ -86,12 +69,11 @@ def generate_script(topic: str) -> dict:
         print(f"Script generation failed: {str(e)}")
         raise
 
-def save_script(script: dict) -> None:
+def save_script(script: dict, output_path: str = os.path.join('generated/scripts', 'generated_script.json')) -> None:
     """
     Save the generated script to a JSON file.
     """
     try:
-        output_path = os.path.join('generated/scripts', 'generated_script.json')
         with open(output_path, 'w') as f:
             json.dump(script, f, indent=4)
         print(f"Script saved to {output_path}")
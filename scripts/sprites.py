@@ -0,0 +1,115 @@
+"""
+Pre-scaled character sprites.
+
+Character images are decoded, scaled to their on-screen width and
+alpha-premultiplied once per output resolution, then cached on disk as
+compact uint8 arrays. Compositing a frame is a single blit of the
+precomputed pixels instead of a lazy per-frame resize and mask blend.
+"""
+import functools
+import hashlib
+import json
+import os
+import numpy as np
+from PIL import Image
+from scripts.helpers.hashing import file_sha256
+import scripts.config as config
+
+
+def sprite_path(image_path: str, width: int) -> str:
+    """
+    Cache path of an image scaled to width.
+    """
+    payload = json.dumps({"image": file_sha256(image_path), "width": width}, sort_keys=True)
+    key = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    return os.path.join(config.VIDEO_SETTINGS["sprite_cache_dir"], f"{key}.npz")
+
+
+def premultiply(image: Image.Image) -> tuple:
+    """
+    Premultiply an image's colour by its alpha.
+    Returns (rgb, alpha) as uint8 arrays.
+    """
+    rgba = np.asarray(image.convert('RGBA'), dtype=np.uint16)
+    alpha = rgba[:, :, 3:]
+    rgb = (rgba[:, :, :3] * alpha + 127) // 255
+    return rgb.astype(np.uint8), alpha.astype(np.uint8)
+
+
+def build_sprite(image_path: str, width: int) -> tuple:
+    """
+    Scale an image to width and premultiply it. Returns (rgb, alpha) as uint8 arrays.
+    """
+    with Image.open(image_path) as image:
+        image = image.convert('RGBA')
+        height = round(image.height * width / image.width)
+        return premultiply(image.resize((width, height), Image.LANCZOS))
+
+
+def to_sprite(rgb: np.ndarray, alpha: np.ndarray) -> dict:
+    """
+    Blittable sprite from premultiplied uint8 arrays. They are widened once
+    here so blitting needs no per-frame conversion.
+    """
+    return {
+        "rgb": rgb.astype(np.uint16),
+        "inv_alpha": (255 - alpha).astype(np.uint16),
+        "width": rgb.shape[1],
+        "height": rgb.shape[0],
+    }
+
+
+def image_sprite(image_path: str) -> dict:
+    """
+    Uncached sprite of an image at its own size, e.g. a pre-rendered subtitle.
+    """
+    with Image.open(image_path) as image:
+        return to_sprite(*premultiply(image))
+
+
+@functools.lru_cache(maxsize=None)
+def load_sprite(image_path: str, width: int) -> dict:
+    """
+    Sprite for an image at width, from the disk cache or built on first use.
+    """
+    path = sprite_path(image_path, width)
+    if os.path.exists(path):
+        with np.load(path) as data:
+            rgb, alpha = data["rgb"], data["alpha"]
+    else:
+        rgb, alpha = build_sprite(image_path, width)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so concurrent runs never read a partial entry
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, rgb=rgb, alpha=alpha)
+        os.replace(tmp_path, path)
+
+    return to_sprite(rgb, alpha)
+
+
+def load_character_sprites(video_w: int) -> dict:
+    """
+    Pre-scaled character sprites keyed by character name, with the side they stand on.
+    """
+    width = int(video_w * config.VIDEO_SETTINGS["character_width"])
+    return {
+        config.CHARACTERS["character1"]["name"]: (load_sprite(config.CHARACTERS["character1"]["image_path"], width), 'left'),
+        config.CHARACTERS["character2"]["name"]: (load_sprite(config.CHARACTERS["character2"]["image_path"], width), 'right'),
+    }
+
+
+def blit_sprite(frame: np.ndarray, sprite: dict, x: int, y: int):
+    """
+    Composite a premultiplied sprite onto an RGB uint8 frame in place, with
+    its top-left corner at (x, y). The sprite is clipped to the frame.
+    """
+    frame_h, frame_w = frame.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + sprite["width"], frame_w), min(y + sprite["height"], frame_h)
+    if x0 >= x1 or y0 >= y1:
+        return
+    sx, sy = x0 - x, y0 - y
+    rgb = sprite["rgb"][sy:sy + y1 - y0, sx:sx + x1 - x0]
+    inv_alpha = sprite["inv_alpha"][sy:sy + y1 - y0, sx:sx + x1 - x0]
+    region = frame[y0:y1, x0:x1]
+    region[:] = rgb + (region * inv_alpha + 127) // 255
@@ -0,0 +1,126 @@
+"""
+Fixed-memory streaming render engine.
+
+One ffmpeg process decodes the background (already sped up) straight into a
+preallocated frame buffer. The speaking character and the current subtitle
+are blitted into it in place, and the buffer is piped to a second ffmpeg
+process that encodes it and muxes the voiceover. Only one frame, the
+character sprites and the current line's subtitle are held at a time, so
+memory stays flat however long the video is.
+"""
+import subprocess
+import numpy as np
+from scripts.background_library import pick_offset, prepare_background
+from scripts.ffmpeg_renderer import encoder_args
+from scripts.sprites import blit_sprite, image_sprite, load_character_sprites
+from scripts.subtitles import render_subtitles
+import scripts.config as config
+
+
+def decode_command(background: dict, offset: float, duration: float) -> list:
+    """
+    ffmpeg command writing the sped-up background as raw RGB frames to stdout.
+    """
+    settings = config.VIDEO_SETTINGS
+    return [
+        config.FFMPEG_BINARY, '-loglevel', 'error',
+        '-ss', f"{offset:.3f}", '-t', f"{duration:.3f}", '-i', background["path"],
+        '-vf', f"setpts=PTS/{settings['speed']},fps={settings['fps']}",
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:1'
+    ]
+
+
+def encode_command(audio_file: str, output_path: str) -> list:
+    """
+    ffmpeg command encoding raw RGB frames from stdin and copying in the (already sped-up) voiceover.
+    """
+    settings = config.VIDEO_SETTINGS
+    return [
+        config.FFMPEG_BINARY, '-y', '-loglevel', 'error',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+        '-s', f"{settings['width']}x{settings['height']}", '-r', str(settings['fps']), '-i', 'pipe:0',
+        '-i', audio_file,
+        '-map', '0:v', '-map', '1:a',
+        *encoder_args(),
+        '-c:a', 'copy',
+        '-shortest',
+        output_path
+    ]
+
+
+def read_frame(stream, view: memoryview) -> bool:
+    """
+    Fill view from stream. Returns False once the stream ends.
+    """
+    filled = 0
+    while filled < len(view):
+        count = stream.readinto(view[filled:])
+        if not count:
+            return False
+        filled += count
+    return True
+
+
+def stream_frames(stream, timeline: dict, character_sprites: dict, subtitle_paths: list):
+    """
+    Yield composited output frames read from a raw RGB stream.
+    The same buffer is yielded every time, so consume each frame before the next.
+    """
+    settings = config.VIDEO_SETTINGS
+    width, height = settings["width"], settings["height"]
+    subtitle_y = int(height * settings["subtitle_y"])
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    view = memoryview(frame).cast('B')
+
+    lines = timeline["lines"]
+    line_index = 0
+    subtitle = None  # Only the current line's subtitle is kept in memory
+    index = 0
+    while read_frame(stream, view):
+        # Position in the voiceover, which plays sped up
+        t = index / settings["fps"] * settings["speed"]
+        while line_index < len(lines) and t >= lines[line_index]["end"]:
+            line_index += 1
+            subtitle = None
+
+        if line_index < len(lines) and t >= lines[line_index]["start"]:
+            line = lines[line_index]
+            sprite, side = character_sprites[line["speaker"]]
+            x = 0 if side == 'left' else width - sprite["width"]
+            blit_sprite(frame, sprite, x, height - sprite["height"])
+
+            if subtitle is None:
+                subtitle = image_sprite(subtitle_paths[line_index])
+            blit_sprite(frame, subtitle, (width - subtitle["width"]) // 2, subtitle_y)
+
+        yield frame
+        index += 1
+
+
+def render_stream(timeline: dict, audio_file: str, output_path: str) -> str:
+    """
+    Render the final video by streaming frames between a decoder and an encoder.
+    """
+    width = config.VIDEO_SETTINGS["width"]
+    background = prepare_background()
+    offset = pick_offset(background, timeline["duration"])
+    subtitle_paths = render_subtitles(timeline["lines"], width)
+    character_sprites = load_character_sprites(width)
+
+    decoder = subprocess.Popen(decode_command(background, offset, timeline["duration"]), stdout=subprocess.PIPE)
+    encoder = subprocess.Popen(encode_command(audio_file, output_path), stdin=subprocess.PIPE)
+    frames = 0
+    try:
+        for frame in stream_frames(decoder.stdout, timeline, character_sprites, subtitle_paths):
+            encoder.stdin.write(frame)
+            frames += 1
+    finally:
+        encoder.stdin.close()
+        decoder.stdout.close()
+
+    if decoder.wait() != 0 or frames == 0:
+        encoder.wait()
+        raise RuntimeError(f"ffmpeg background decode failed after {frames} frames")
+    if encoder.wait() != 0:
+        raise RuntimeError("ffmpeg video encode failed")
+    return output_path
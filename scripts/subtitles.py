@@ -0,0 +1,147 @@
+"""
+Subtitle rasterization.
+
+Each line's caption is rendered with Pillow to a transparent RGBA PNG that
+any render engine can overlay. Captions are cached on disk keyed by
+(text, style, width), so repeated phrases and re-renders cost nothing, and
+wrapped lines are cached in memory while a batch is being rendered.
+"""
+import functools
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageDraw, ImageFont
+import scripts.config as config
+
+
+def clean_text(text: str) -> str:
+    return text.replace('*', '').replace('"', '')
+
+
+@functools.lru_cache(maxsize=None)
+def load_font(size: int):
+    """
+    First configured font Pillow can load, falling back to its built-in font.
+    """
+    for font in config.SUBTITLE_SETTINGS["fonts"]:
+        try:
+            return ImageFont.truetype(font, size)
+        except OSError:
+            continue
+    print(f"No subtitle font found in {config.SUBTITLE_SETTINGS['fonts']}, using Pillow's default font")
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has no scalable default font
+        return ImageFont.load_default()
+
+
+def subtitle_style(speaker: str, video_w: int) -> dict:
+    """
+    Caption style for a speaker's subtitles, scaled to the video width.
+    """
+    settings = config.SUBTITLE_SETTINGS
+    scale = video_w / settings["reference_width"]
+    fontsize = max(1, round(settings["font_size"] * scale))
+    return {
+        'font': getattr(load_font(fontsize), 'path', 'default'),
+        'fontsize': fontsize,
+        'color': settings["colors"].get(speaker, 'white'),
+        'stroke_color': settings["stroke_color"],
+        'stroke_width': max(1, round(settings["stroke_width"] * scale)),
+    }
+
+
+def wrap_text(text: str, font, max_width: float) -> list:
+    """
+    Greedy word wrap so that no line is wider than max_width.
+    """
+    lines = []
+    current = ""
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if current and font.getlength(candidate) > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+@functools.lru_cache(maxsize=1024)
+def render_line(text: str, fontsize: int, color: str, stroke_color: str, stroke_width: int) -> Image.Image:
+    """
+    One stroked line of text on a transparent background.
+    """
+    font = load_font(fontsize)
+    ascent, descent = font.getmetrics()
+    width = int(font.getlength(text)) + 2 * stroke_width
+    height = ascent + descent + 2 * stroke_width
+    image = Image.new('RGBA', (max(width, 1), height), (0, 0, 0, 0))
+    ImageDraw.Draw(image).text(
+        (stroke_width, stroke_width), text, font=font, fill=color,
+        stroke_width=stroke_width, stroke_fill=stroke_color
+    )
+    return image
+
+
+def rasterize(text: str, style: dict, width: int) -> Image.Image:
+    """
+    Caption box of the given width with centered, wrapped lines.
+    """
+    font = load_font(style['fontsize'])
+    lines = [
+        render_line(line, style['fontsize'], style['color'], style['stroke_color'], style['stroke_width'])
+        for line in wrap_text(text, font, width - 2 * style['stroke_width'])
+    ]
+    height = sum(line.height for line in lines) or 1
+    caption = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    y = 0
+    for line in lines:
+        caption.alpha_composite(line, ((width - line.width) // 2, y))
+        y += line.height
+    return caption
+
+
+def subtitle_path(text: str, style: dict, width: int) -> str:
+    """
+    Cache path of a caption, keyed by its text, style and width.
+    """
+    key = hashlib.sha256(json.dumps([text, style, width], sort_keys=True).encode('utf-8')).hexdigest()
+    return os.path.join(config.SUBTITLE_SETTINGS["cache_dir"], f"{key}.png")
+
+
+def render_subtitle(text: str, speaker: str, video_w: int) -> str:
+    """
+    Render a caption to an RGBA PNG, or reuse the cached one.
+    Returns the PNG path.
+    """
+    text = clean_text(text)
+    style = subtitle_style(speaker, video_w)
+    width = int(video_w * config.VIDEO_SETTINGS["subtitle_width"])
+    path = subtitle_path(text, style, width)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first so concurrent runs never read a partial PNG
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    rasterize(text, style, width).save(tmp_path, format='PNG')
+    os.replace(tmp_path, path)
+    return path
+
+
+def render_subtitles(lines: list, video_w: int, workers: int = None) -> list:
+    """
+    Render the captions of all timeline lines concurrently.
+    Returns the PNG paths in line order.
+    """
+    workers = workers or config.SUBTITLE_SETTINGS["workers"]
+    # Repeated captions are rendered once
+    captions = list(dict.fromkeys((line["text"], line["speaker"]) for line in lines))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        paths = dict(zip(captions, executor.map(lambda caption: render_subtitle(*caption, video_w), captions)))
+    return [paths[(line["text"], line["speaker"])] for line in lines]
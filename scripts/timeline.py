@@ -0,0 +1,76 @@
+"""
+Timing manifest written next to the combined voiceover.
+
+The voiceover stage already knows every line's exact length, so it records
+the timeline once and the video stage reads it instead of probing audio files.
+Line times are in unsped voiceover seconds; the combined audio itself is
+already sped up by the recorded speed.
+"""
+import json
+import os
+
+
+def timeline_path(audio_path: str) -> str:
+    """
+    Manifest path for a combined audio file, e.g. combined_voiceover.json.
+    """
+    return os.path.splitext(audio_path)[0] + '.json'
+
+
+def line_samples(line: dict) -> int:
+    """
+    Length of a synthesized line in samples.
+    """
+    pcm = line["audio"][0]
+    assert pcm.ndim == 1, f"expected mono PCM for line {line['key']}, got shape {pcm.shape}"
+    return pcm.shape[-1]
+
+
+def timeline_entry(line: dict, offset: int, sample_rate: int) -> dict:
+    """
+    Timing of one synthesized line that starts at sample offset in the combined audio.
+    """
+    samples = line_samples(line)
+    return {
+        "key": line["key"],
+        "speaker": line["character"],
+        "text": line["text"],
+        "start": offset / sample_rate,
+        "end": (offset + samples) / sample_rate,
+        "duration": samples / sample_rate,
+        "start_sample": offset,
+        "end_sample": offset + samples,
+    }
+
+
+def build_timeline(lines: list, sample_rate: int, audio_path: str, speed: float = 1.0) -> dict:
+    """
+    Lay the lines out back to back and record start/end times and sample offsets.
+    """
+    entries = []
+    offset = 0
+    for line in lines:
+        entries.append(timeline_entry(line, offset, sample_rate))
+        offset += line_samples(line)
+
+    return {
+        "audio": os.path.basename(audio_path),
+        "sample_rate": sample_rate,
+        "total_samples": offset,
+        "duration": offset / sample_rate,
+        "speed": speed,
+        "playback_duration": offset / sample_rate / speed,
+        "lines": entries,
+    }
+
+
+def save_timeline(timeline: dict, audio_path: str) -> str:
+    path = timeline_path(audio_path)
+    with open(path, 'w') as f:
+        json.dump(timeline, f, indent=4)
+    return path
+
+
+def load_timeline(audio_path: str) -> dict:
+    with open(timeline_path(audio_path), 'r') as f:
+        return json.load(f)
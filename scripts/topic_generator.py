@@ -1,49 +1,57 @@
-from google import genai
 import os
 import json
-
-# Configure Gemini API
-GOOGLE_API_KEY = os.getenv('GEMINI_API_KEY')
-GEMINI_MODEL = os.getenv('GEMINI_MODEL')
-if not GOOGLE_API_KEY:
-    raise ValueError("GEMINI_API_KEY not set")
-if not GEMINI_MODEL:
-    raise ValueError("GEMINI_MODEL not set")
-
-try:
-    client = genai.Client(api_key=GOOGLE_API_KEY)
-except Exception as e:
-    print(f"Gemini client failed: {str(e)}")
-    raise
+from scripts.helpers.file_lock import file_lock
+from scripts.llm_client import generate
 
 TOPICS_FILE = "data/used_topics.json"
 GENERATED_TOPIC_FILE = "generated_topic.txt"
 
 
-def generate_topic(user_topic: str = None) -> str:
+def load_used_topics() -> set:
+    if not os.path.exists(TOPICS_FILE):
+        return set()
+    with open(TOPICS_FILE, 'r') as f:
+        return set(json.load(f))
+
+
+def save_used_topics(used_topics: set):
+    with open(TOPICS_FILE, 'w') as f:
+        json.dump(list(used_topics), f)
+
+
+def claim_topic(topic: str, force: bool = False, reset: bool = False) -> bool:
+    """
+    Add topic to the used-topics list unless another run already has it.
+    force records it even if it was used before; reset clears the list first.
+    Returns False if the topic was already used.
+    """
+    # Concurrent runs share the list; the lock is only held for the read-modify-write,
+    # never while waiting on Gemini
+    with file_lock(TOPICS_FILE):
+        used_topics = set() if reset else load_used_topics()
+        already_used = topic in used_topics
+        if already_used and not force:
+            return False
+        used_topics.add(topic)
+        save_used_topics(used_topics)
+        return not already_used
+
+
+def generate_topic(user_topic: str = None, output_path: str = GENERATED_TOPIC_FILE) -> str:
     """
     Generate a random development topic using Gemini AI, ensuring it hasn't been used before.
+    The topic is written to output_path.
     """
     try:
         # Create data directory if it doesn't exist
         os.makedirs("data", exist_ok=True)
         
-        # Load used topics
-        used_topics = set()
-        if os.path.exists(TOPICS_FILE):
-            with open(TOPICS_FILE, 'r') as f:
-                used_topics = set(json.load(f))
-        
         # If user provided a topic, use it
         if user_topic:
-            if user_topic in used_topics:
+            if not claim_topic(user_topic, force=True):
                 print(f"Topic '{user_topic}' has been used before")
-            # Save user topic to both files
-            with open(GENERATED_TOPIC_FILE, 'w') as f:
+            with open(output_path, 'w') as f:
                 f.write(user_topic)
-            used_topics.add(user_topic)
-            with open(TOPICS_FILE, 'w') as f:
-                json.dump(list(used_topics), f)
             return user_topic
         
         # Generate new topic using Gemini
@@ -52,38 +60,24 @@ def generate_topic(user_topic: str = None) -> str:
         The topic should be related to fullstack web development, programming, or software engineering.
         Return ONLY the topic name, nothing else."""
         
-        response = client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=prompt
-        )
-        
-        topic = response.text.strip()
-        
         # Keep generating until we get a unique topic
         max_attempts = 5
-        attempts = 0
-        while topic in used_topics and attempts < max_attempts:
-            response = client.models.generate_content(
-                model=GEMINI_MODEL,
-                contents=prompt
-            )
-            topic = response.text.strip()
-            attempts += 1
-        
-        if attempts >= max_attempts:
+        used_topics = load_used_topics()
+        for _ in range(max_attempts + 1):
+            topic = generate(prompt).strip()
+            if topic in used_topics:
+                continue
+            # Re-checked under the lock: another run may have taken it while we waited on Gemini
+            if claim_topic(topic):
+                break
+            used_topics = load_used_topics()
+        else:
             # If we can't generate a unique topic, clear the used topics
-            used_topics.clear()
-            with open(TOPICS_FILE, 'w') as f:
-                json.dump(list(used_topics), f)
+            claim_topic(topic, reset=True)
             print("Cleared used topics due to difficulty generating new unique topic")
-        
-        # Add new topic to used topics and save to both files
-        used_topics.add(topic)
-        with open(TOPICS_FILE, 'w') as f:
-            json.dump(list(used_topics), f)
             
-        # Save current topic to generated_topic.txt
-        with open(GENERATED_TOPIC_FILE, 'w') as f:
+        # Save current topic to the run's topic file
+        with open(output_path, 'w') as f:
             f.write(topic)
         
         print(f"Generated new topic: {topic}")
@@ -0,0 +1,94 @@
+"""
+Content-addressed on-disk cache for synthesized dialogue lines.
+
+Entries are keyed by a hash of the line text, the speaker profile contents,
+the model id and the generation settings, so a rerun of an unchanged
+(or mostly unchanged) script only synthesizes the lines that changed.
+The cache is capped in size and evicts the least recently used entries.
+"""
+import hashlib
+import json
+import os
+import numpy as np
+from scripts.config import CHARACTERS, TTS_CACHE, TTS_SETTINGS
+from scripts.helpers.hashing import file_sha256
+
+
+class TTSCache:
+    """
+    LRU-capped directory of synthesized lines (float32 PCM in .npz files) with hit/miss counters.
+    The file modification time doubles as the LRU clock.
+    """
+
+    def __init__(self, cache_dir: str = TTS_CACHE["dir"], max_bytes: int = TTS_CACHE["max_bytes"]):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, text: str, character: str) -> str:
+        speaker_path = next(c["audio_json_path"] for c in CHARACTERS.values() if c["name"] == character)
+        payload = json.dumps({
+            "text": text,
+            "speaker": file_sha256(speaker_path),
+            "model": [TTS_SETTINGS["model_path"], TTS_SETTINGS["backend"], TTS_SETTINGS["quantization"]],
+            "generation": TTS_SETTINGS["generation"],
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key: str):
+        """
+        Return the cached (PCM, sample rate) for a line, or None on a miss.
+        """
+        entry = self._entry_path(key)
+        try:
+            with np.load(entry) as data:
+                # Entries written before to_pcm flattened OuteTTS's (1, 1, N) output hold (1, N) arrays
+                audio = (data["pcm"].reshape(-1), int(data["sample_rate"]))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # Mark as recently used
+        os.utime(entry)
+        self.hits += 1
+        return audio
+
+    def put(self, key: str, pcm: np.ndarray, sample_rate: int):
+        """
+        Store a synthesized line, then evict old entries if over the size cap.
+        """
+        entry = self._entry_path(key)
+        # Write under a temporary name so readers never see a partial file
+        tmp_path = f"{entry}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, pcm=pcm, sample_rate=sample_rate)
+        os.replace(tmp_path, entry)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.npz'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
@@ -0,0 +1,56 @@
+"""
+Single place where the OuteTTS model is constructed.
+
+The backend and quantization come from TTS_SETTINGS in scripts/config.py, so
+voiceover generation, the TTS server and create_speakers.py all load the same model.
+"""
+import outetts
+import torch
+from scripts.config import TTS_SETTINGS
+
+
+# Backends OuteTTS can build from TTS_SETTINGS: the HF weights directly, or the GGUF
+# weights auto_config downloads for llama.cpp. auto_config raises NotImplementedError
+# for every other backend, and only once the model starts loading.
+SUPPORTED_BACKENDS = ("HF", "LLAMACPP")
+
+
+def check_backend(backend: str = None) -> str:
+    """
+    Validate a backend name (TTS_SETTINGS["backend"] if omitted) before any model is loaded.
+    """
+    backend = backend or TTS_SETTINGS["backend"]
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(f"Unsupported TTS backend {backend!r}; TTS_BACKEND must be one of {', '.join(SUPPORTED_BACKENDS)}")
+    return backend
+
+
+def create_interface(backend: str = None, quantization: str = None) -> outetts.Interface:
+    """
+    Build an OuteTTS interface.
+    backend is one of SUPPORTED_BACKENDS (HF or LLAMACPP),
+    quantization an outetts.LlamaCppQuantization member name (FP16, Q8_0, Q5_K_M, Q4_K_M, ...).
+    Both default to TTS_SETTINGS.
+    """
+    backend = outetts.Backend[check_backend(backend)]
+    quantization = outetts.LlamaCppQuantization[quantization or TTS_SETTINGS["quantization"]]
+
+    if backend == outetts.Backend.HF:
+        model_config = outetts.ModelConfig(
+            model_path=TTS_SETTINGS["model_path"],
+            tokenizer_path=TTS_SETTINGS["tokenizer_path"],
+            interface_version=outetts.InterfaceVersion.V3,
+            backend=backend,
+            quantization=quantization,
+            device=torch.device("cuda" if torch.cuda.is_available() else "cpu"),
+            dtype=torch.bfloat16
+        )
+    else:
+        # Let OuteTTS resolve the GGUF file for the llama.cpp quantization
+        model_config = outetts.ModelConfig.auto_config(
+            model=outetts.Models[TTS_SETTINGS["auto_model"]],
+            backend=backend,
+            quantization=quantization
+        )
+
+    return outetts.Interface(config=model_config)
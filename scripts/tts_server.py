@@ -0,0 +1,125 @@
+"""
+Long-lived voiceover server.
+
+Keeps the OuteTTS model and both speaker profiles loaded and serves synthesis
+requests over a local socket, so repeated runs (e.g. launcher.py) don't pay the
+model load every time. generate_voiceover() uses it automatically when it is running.
+
+    python -m scripts.tts_server
+"""
+import socket
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import connection
+from scripts.config import TTS_SERVER
+from scripts.voiceover_generator import LocalSynthesizer, connect_tts_server, set_recv_timeout, tts_authkey
+
+# Synthesizer methods clients are allowed to call
+SERVER_OPS = {"synthesize", "synthesize_batch"}
+
+
+def handle_client(conn: connection.Connection, synthesizer: LocalSynthesizer, lock: threading.Lock):
+    """
+    Serve requests from one client until it disconnects.
+    """
+    with conn:
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                break
+
+            try:
+                op = request["op"]
+                if op == "ping":
+                    result = "pong"
+                elif op in SERVER_OPS:
+                    # One model instance, so requests from concurrent clients are serialized
+                    with lock:
+                        result = getattr(synthesizer, op)(**request["args"])
+                else:
+                    raise ValueError(f"Unknown op: {op}")
+                conn.send({"status": "ok", "result": result})
+            except Exception as e:
+                print(f"TTS request failed: {str(e)}")
+                conn.send({"status": "error", "error": str(e)})
+
+
+def authenticate_client(sock: socket.socket, peer: tuple, authkey: bytes, synthesizer: LocalSynthesizer,
+                        lock: threading.Lock):
+    """
+    Run the handshake with a freshly accepted socket, bounded by TTS_SERVER["handshake_timeout"],
+    and serve the client if it knows the key.
+    """
+    sock.setblocking(True)
+    conn = connection.Connection(sock.detach())
+    # Same handshake as Listener.accept(), but on this client's thread and with a timeout,
+    # so a peer that hangs up or never answers can't stop other clients from connecting
+    try:
+        set_recv_timeout(conn, TTS_SERVER["handshake_timeout"])
+        connection.deliver_challenge(conn, authkey)
+        connection.answer_challenge(conn, authkey)
+        set_recv_timeout(conn, 0)
+    except (OSError, EOFError, connection.AuthenticationError) as e:
+        print(f"Rejected TTS client {peer[0]}:{peer[1]}: {str(e) or type(e).__name__}")
+        conn.close()
+        return
+    handle_client(conn, synthesizer, lock)
+
+
+def serve():
+    """
+    Load the model once, then accept clients until interrupted.
+    """
+    print("Loading TTS model...")
+    synthesizer = LocalSynthesizer()
+    lock = threading.Lock()
+    authkey = tts_authkey()
+
+    # Only start listening once the model is ready, so clients never wait on a cold server
+    address = (TTS_SERVER["host"], TTS_SERVER["port"])
+    with socket.create_server(address) as listener:
+        print(f"TTS server listening on {address[0]}:{address[1]}")
+        while True:
+            try:
+                sock, peer = listener.accept()
+            except OSError as e:
+                print(f"TTS server accept failed: {str(e)}")
+                continue
+            threading.Thread(target=authenticate_client, args=(sock, peer, authkey, synthesizer, lock),
+                             daemon=True).start()
+
+
+def ensure_tts_server():
+    """
+    Start a TTS server in the background unless one is already running,
+    and wait until it accepts connections. Returns the server process, or None
+    if an existing server was found.
+    """
+    conn = connect_tts_server()
+    if conn is not None:
+        conn.close()
+        return None
+
+    process = subprocess.Popen([sys.executable, "-m", "scripts.tts_server"])
+    deadline = time.time() + TTS_SERVER["startup_timeout"]
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"TTS server exited with code {process.returncode}")
+        conn = connect_tts_server()
+        if conn is not None:
+            conn.close()
+            return process
+        time.sleep(2)
+
+    process.terminate()
+    raise TimeoutError("TTS server did not start in time")
+
+
+if __name__ == "__main__":
+    try:
+        serve()
+    except KeyboardInterrupt:
+        print("TTS server stopped")
@@ -1,33 +1,18 @@
-from instagrapi import Client
+from instagrapi.exceptions import LoginRequired
 import json
-from google import genai
-import os
-
-# Configure Gemini API
-GOOGLE_API_KEY = os.getenv('GEMINI_API_KEY')
-GEMINI_MODEL = os.getenv('GEMINI_MODEL')
-if not GOOGLE_API_KEY:
-    raise ValueError("GEMINI_API_KEY not set")
-if not GEMINI_MODEL:
-    raise ValueError("GEMINI_MODEL not set")
-
-try:
-    client = genai.Client(api_key=GOOGLE_API_KEY)
-except Exception as e:
-    print(f"Gemini client failed: {str(e)}")
-    raise
-
-# Credentials
-USERNAME = "fullstackwalter"
-PASSWORD = "Lk@328001"
-SESSION_FILE = f"{USERNAME}_session.json"
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from scripts.instagram_sessions import get_session_pool
+from scripts.llm_client import generate
+from scripts.variants import pick_variant
 
 # Path to the video
 VIDEO_PATH = "./final_video.mp4"
+SCRIPT_PATH = "./generated/scripts/generated_script.json"
 
-def generate_caption():
+def generate_caption(script_path: str = SCRIPT_PATH):
     try:
-        with open('./generated/scripts/generated_script.json', 'r') as f:
+        with open(script_path, 'r') as f:
             script = json.load(f)
 
         dialogue = ""
@@ -49,52 +34,52 @@ def generate_caption():
         5. Maximum 300 characters
         """
 
-        response = client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=prompt
-        )
-        return response.text
+        return generate(prompt)
 
     except Exception as e:
         print(f"Error generating caption: {e}")
         return "Breaking Bad Teaching You How To Be A Good Person 🎬 #BreakingBad #WalterWhite #JessePinkman #AI #viral"
 
-def login_with_session(cl: Client):
-    if os.path.exists(SESSION_FILE):
-        try:
-            cl.load_settings(SESSION_FILE)
-            cl.login(USERNAME, PASSWORD)
-            print("✅ Logged in using saved session.")
-        except Exception as e:
-            print("⚠️ Failed to login using saved session. Retrying fresh login...")
-            cl.set_settings({})
-            cl.login(USERNAME, PASSWORD)
-            cl.dump_settings(SESSION_FILE)
-            print("✅ Logged in fresh and saved new session.")
-    else:
-        cl.login(USERNAME, PASSWORD)
-        cl.dump_settings(SESSION_FILE)
-        print("✅ Logged in and saved new session.")
-
-def upload_reel(video_path: str = VIDEO_PATH):
+def upload_reel(video_path: str = VIDEO_PATH, script_path: str = SCRIPT_PATH, thumbnail_path: str = None,
+                account: str = None) -> dict:
+    """
+    Upload a Reel, using the Instagram variant of video_path when there is one.
+    thumbnail_path is a ready-made cover; without one instagrapi decodes the
+    video to make its own. account picks one of INSTAGRAM_ACCOUNTS (the first
+    one by default); its logged-in client is reused across runs.
+    Returns the Reel's URL and caption; raises if the upload fails.
+    """
     try:
-        # Generate caption
-        caption = generate_caption()
+        pool = get_session_pool()
 
-        # Instagram Client
-        cl = Client()
-        login_with_session(cl)
+        # Caption generation and session checks are independent network calls
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            caption_future = executor.submit(generate_caption, script_path)
+            client_future = executor.submit(pool.get, account)
+            caption = caption_future.result()
+            cl = client_future.result()
 
         # Upload the Reel
-        media = cl.clip_upload(video_path, caption)
-
+        video_path = pick_variant(video_path, "instagram")
+        thumbnail = Path(thumbnail_path) if thumbnail_path else None
+        try:
+            media = cl.clip_upload(video_path, caption, thumbnail=thumbnail)
+        except LoginRequired:
+            # The session expired since it was last checked: re-check it and try once more
+            pool.invalidate(account)
+            cl = pool.get(account)
+            media = cl.clip_upload(video_path, caption, thumbnail=thumbnail)
+
+        url = f"https://www.instagram.com/reel/{media.pk}/"
         print("✅ Reel uploaded successfully!")
-        print("📎 Reel URL:", f"https://www.instagram.com/reel/{media.pk}/")
+        print("📎 Reel URL:", url)
         print("📝 Used caption:", caption)
+        return {"platform": "instagram", "url": url, "caption": caption}
 
     except Exception as e:
         print("❌ Failed to upload Reel:")
         print(e)
+        raise
 
 if __name__ == "__main__":
     upload_reel()
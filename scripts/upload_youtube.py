@@ -2,11 +2,16 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
-from google import genai
 import os
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from google.auth.transport.requests import Request
+from scripts.config import YOUTUBE_UPLOAD
+from scripts.helpers.file_lock import file_lock
+from scripts.llm_client import generate
+from scripts.resumable_upload import execute_resumable, with_endpoint
+from scripts.variants import pick_variant
 
 # Set up logging
 logging.basicConfig(
@@ -18,33 +23,25 @@ logger = logging.getLogger(__name__)
 # OAuth 2.0 credentials
 SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
 CLIENT_SECRETS_FILE = "client_secrets.json"
+ENV_FILE = ".env"
 
 # Video details
 VIDEO_PATH = "generated/videos/final_video.mp4"
-GEMINI_MODEL = os.getenv('GEMINI_MODEL')
+TOPIC_PATH = "generated_topic.txt"
 YOUTUBE_TOKEN = os.getenv('YOUTUBE_TOKEN')
-if not GEMINI_MODEL:
-    raise ValueError("GEMINI_MODEL not set")
 
-def get_video_details():
+def get_video_details(topic_path: str = TOPIC_PATH):
     """Get video title and description using Gemini AI based on current topic"""
     try:
         # Read current topic
-        with open('./generated_topic.txt', 'r') as f:
+        with open(topic_path, 'r') as f:
             topic = f.read().strip()
-            
-        client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
         
         # Generate title prompt
         title_prompt = f"""Create a catchy YouTube Shorts title for a video explaining '{topic}'.
         The title should be engaging, include emojis, and be optimized for reach.
         Keep it under 100 characters. Make it Breaking Bad themed."""
         
-        title_response = client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=title_prompt
-        )
-        
         # Generate description prompt
         desc_prompt = f"""Create an engaging YouTube Shorts description for a video explaining '{topic}'.
         Include relevant trending hashtags related to:
@@ -54,13 +51,15 @@ def get_video_details():
         - Tech Education
         Make it catchy and optimized for reach. Keep it under 500 characters."""
         
-        desc_response = client.models.generate_content(
-            model=GEMINI_MODEL, 
-            contents=desc_prompt
-        )
+        # Title and description are independent requests, so make them concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            title_future = executor.submit(generate, title_prompt)
+            desc_future = executor.submit(generate, desc_prompt)
+            title_text = (title_future.result() or "").strip()
+            desc_text = (desc_future.result() or "").strip()
         
-        title = title_response.text.strip() if title_response.text.strip() else f"Breaking Bad Explains: {topic} 🧪💻"
-        desc = desc_response.text.strip() if desc_response.text.strip() else f"{topic} explained Breaking Bad style! #shorts #coding #breakingbad"
+        title = title_text if title_text else f"Breaking Bad Explains: {topic} 🧪💻"
+        desc = desc_text if desc_text else f"{topic} explained Breaking Bad style! #shorts #coding #breakingbad"
         
         # Validate title is not empty
         if not title or len(title.strip()) == 0:
@@ -71,10 +70,43 @@ def get_video_details():
     except Exception as e:
         logger.error(f"Failed to generate video details: {e}")
         # Read topic from file as fallback
-        with open('generated_topic.txt', 'r') as f:
+        with open(topic_path, 'r') as f:
             topic = f.read().strip()
         return f"Breaking Bad Explains: {topic} 🧪💻", f"{topic} explained Breaking Bad style! #shorts #coding #breakingbad"
 
+def read_env_token(env_path: str = ENV_FILE):
+    """YOUTUBE_TOKEN as currently saved in .env, or None."""
+    if not os.path.exists(env_path):
+        return None
+    with open(env_path, 'r') as f:
+        for line in f:
+            if line.startswith('YOUTUBE_TOKEN='):
+                return line[len('YOUTUBE_TOKEN='):].strip()
+    return None
+
+def save_env_token(token_json: str, env_path: str = ENV_FILE):
+    """Write YOUTUBE_TOKEN into .env. Call with the .env file lock held."""
+    if os.path.exists(env_path):
+        with open(env_path, 'r') as f:
+            env_lines = f.readlines()
+        
+        # Find and replace or append YOUTUBE_TOKEN
+        token_updated = False
+        for i, line in enumerate(env_lines):
+            if line.startswith('YOUTUBE_TOKEN='):
+                env_lines[i] = f'YOUTUBE_TOKEN={token_json}\n'
+                token_updated = True
+                break
+        
+        if not token_updated:
+            env_lines.append(f'\nYOUTUBE_TOKEN={token_json}\n')
+            
+        with open(env_path, 'w') as f:
+            f.writelines(env_lines)
+    else:
+        with open(env_path, 'w') as f:
+            f.write(f'YOUTUBE_TOKEN={token_json}\n')
+
 def get_credentials():
     """Get valid credentials from environment variable or user auth."""
     credentials = None
@@ -86,6 +118,15 @@ def get_credentials():
     
     # If no valid credentials, get new ones
     if not credentials or not credentials.valid:
+        # Another run may have refreshed the token since this process read its environment
+        with file_lock(ENV_FILE):
+            saved_token = read_env_token()
+        if saved_token and saved_token != YOUTUBE_TOKEN:
+            saved = Credentials.from_authorized_user_info(json.loads(saved_token), SCOPES)
+            if saved.valid:
+                return saved
+            credentials = saved
+
         if credentials and credentials.expired and credentials.refresh_token:
             credentials.refresh(Request())
         else:
@@ -94,45 +135,42 @@ def get_credentials():
         
         # Save credentials to environment variable
         token_json = credentials.to_json()
-        # Update YOUTUBE_TOKEN in .env
-        env_path = '.env'
-        if os.path.exists(env_path):
-            with open(env_path, 'r') as f:
-                env_lines = f.readlines()
-            
-            # Find and replace or append YOUTUBE_TOKEN
-            token_updated = False
-            for i, line in enumerate(env_lines):
-                if line.startswith('YOUTUBE_TOKEN='):
-                    env_lines[i] = f'YOUTUBE_TOKEN={token_json}\n'
-                    token_updated = True
-                    break
-            
-            if not token_updated:
-                env_lines.append(f'\nYOUTUBE_TOKEN={token_json}\n')
-                
-            with open(env_path, 'w') as f:
-                f.writelines(env_lines)
-        else:
-            with open(env_path, 'w') as f:
-                f.write(f'YOUTUBE_TOKEN={token_json}\n')
+        # Concurrent runs share .env, so update it under a lock
+        with file_lock(ENV_FILE):
+            save_env_token(token_json)
         logger.info("New credentials generated. Please update YOUTUBE_TOKEN in .env with:")
         logger.info(token_json)
             
     return credentials
 
-def upload_short(video_path: str = VIDEO_PATH):
+def set_thumbnail(youtube, video_id: str, thumbnail_path: str):
+    """Set a custom thumbnail. Needs a verified channel, so failures are only logged."""
     try:
-        # Get AI generated title and description
-        title, description = get_video_details()
-        
-        # Get credentials and build service
-        credentials = get_credentials()
-        youtube = build('youtube', 'v3', credentials=credentials)
+        youtube.thumbnails().set(
+            videoId=video_id,
+            media_body=MediaFileUpload(thumbnail_path, mimetype='image/jpeg')
+        ).execute()
+        logger.info(f"Thumbnail set from {thumbnail_path}")
+    except Exception as e:
+        logger.warning(f"Failed to set thumbnail: {e}")
+
+def upload_short(video_path: str = VIDEO_PATH, topic_path: str = TOPIC_PATH, thumbnail_path: str = None) -> dict:
+    """Upload a Short. Returns its URL, title and description; raises if the upload fails."""
+    try:
+        # Generate the title and description while OAuth credentials are refreshed
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            details_future = executor.submit(get_video_details, topic_path)
+            credentials_future = executor.submit(get_credentials)
+            title, description = details_future.result()
+            credentials = credentials_future.result()
+
+        # Build service
+        client_options = {"api_endpoint": YOUTUBE_UPLOAD["api_endpoint"]} if YOUTUBE_UPLOAD["api_endpoint"] else None
+        youtube = build('youtube', 'v3', credentials=credentials, client_options=client_options)
         
         # Ensure title is not empty and valid
         if not title or len(title.strip()) == 0:
-            with open('generated_topic.txt', 'r') as f:
+            with open(topic_path, 'r') as f:
                 topic = f.read().strip()
             title = f"Breaking Bad Explains: {topic} 🧪💻"
             
@@ -153,27 +191,37 @@ def upload_short(video_path: str = VIDEO_PATH):
             }
         }
         
-        # Create MediaFileUpload object
+        # Create MediaFileUpload object, from the Shorts variant when there is one
+        video_path = pick_variant(video_path, "youtube")
+        logger.info(f"Uploading {video_path}")
         media = MediaFileUpload(video_path, 
                               mimetype='video/mp4',
+                              chunksize=YOUTUBE_UPLOAD["chunk_size"],
                               resumable=True)
         
         # Execute upload
-        request = youtube.videos().insert(
+        request = with_endpoint(youtube.videos().insert(
             part='snippet,status',
             body=body,
             media_body=media
-        )
+        ), YOUTUBE_UPLOAD["api_endpoint"])
         
-        response = request.execute()
+        # Upload chunk by chunk, retrying and resuming the saved session if there is one
+        response = execute_resumable(request, video_path)
+
+        if thumbnail_path:
+            set_thumbnail(youtube, response['id'], thumbnail_path)
         
+        url = f"https://youtu.be/{response['id']}"
         logger.info("Video uploaded to YouTube successfully!")
-        logger.info(f"Video URL: https://youtu.be/{response['id']}")
+        logger.info(f"Video URL: {url}")
         logger.info(f"Title: {title}")
         logger.info(f"Description: {description}")
+        return {"platform": "youtube", "url": url, "title": title, "description": description}
         
     except Exception as e:
         logger.error(f"Failed to upload Short: {e}")
+        raise
 
 if __name__ == "__main__":
     upload_short()
@@ -0,0 +1,65 @@
+"""
+Per-platform upload variants.
+
+The master render is transcoded concurrently into one smaller file per
+platform (see PLATFORM_VARIANTS), saved next to it as <video>_<platform>.mp4.
+Each uploader picks its own variant, falling back to the master. The
+voiceover is already AAC, so it is copied, not re-encoded.
+"""
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import scripts.config as config
+
+
+def variant_path(video_path: str, platform: str) -> str:
+    root, ext = os.path.splitext(video_path)
+    return f"{root}_{platform}{ext}"
+
+
+def pick_variant(video_path: str, platform: str) -> str:
+    """
+    The platform's variant of a video if it was generated, else the video itself.
+    """
+    path = variant_path(video_path, platform)
+    return path if os.path.exists(path) else video_path
+
+
+def transcode_variant(video_path: str, platform: str) -> str:
+    """
+    Transcode the master into one platform variant. Returns the variant path.
+    """
+    settings = config.PLATFORM_VARIANTS[platform]
+    output_path = variant_path(video_path, platform)
+    filters = [f"scale='min(iw,{settings['width']})':-2"]
+    if settings["fps"]:
+        filters.append(f"fps={settings['fps']}")
+    subprocess.run([
+        config.FFMPEG_BINARY, '-y', '-loglevel', 'error',
+        '-i', video_path,
+        '-vf', ','.join(filters),
+        '-c:v', 'libx264', '-preset', settings["preset"], '-crf', str(settings["crf"]),
+        '-maxrate', settings["maxrate"], '-bufsize', settings["bufsize"],
+        '-pix_fmt', 'yuv420p',
+        '-c:a', 'copy',
+        '-movflags', '+faststart',
+        output_path
+    ], check=True)
+    size = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"{platform} variant saved to {output_path} ({size:.1f} MB)")
+    return output_path
+
+
+def generate_variants(video_path: str, platforms: list = None) -> dict:
+    """
+    Transcode all platform variants of a master render concurrently.
+    Returns {platform: variant path}.
+    """
+    platforms = platforms or list(config.PLATFORM_VARIANTS)
+    try:
+        with ThreadPoolExecutor(max_workers=len(platforms)) as executor:
+            paths = list(executor.map(lambda platform: transcode_variant(video_path, platform), platforms))
+    except Exception as e:
+        print(f"Variant generation failed: {str(e)}")
+        raise
+    return dict(zip(platforms, paths))
@@ -1,162 +1,265 @@
+import bisect
+import json
 import os
-import moviepy.config
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from moviepy.video.fx.resize import resize
-from moviepy.editor import VideoFileClip, AudioFileClip, TextClip, CompositeVideoClip, ImageClip
-import json
-import moviepy
-from pydub import AudioSegment
-from pydub.utils import mediainfo
-from scripts.helpers.dowload_sample import download_sample_video
+from moviepy.editor import VideoFileClip, CompositeVideoClip, ImageClip
+from scripts.background_library import pick_offset, prepare_background
+from scripts.ffmpeg_renderer import render_ffmpeg
+from scripts.helpers.metrics import MemorySampler
+from scripts.sprites import blit_sprite, load_character_sprites
+from scripts.stream_renderer import render_stream
+from scripts.subtitles import render_subtitle, render_subtitles
+from scripts.timeline import load_timeline
 import scripts.config as config
 
-IMAGE_MAGICK_PATH = os.getenv('IMAGEMAGICK_BINARY')
+SPEED_FACTOR = config.VIDEO_SETTINGS["speed"]
+
+
+def video_write_settings() -> dict:
+    """
+    write_videofile encoder settings of the current render profile, shared by full renders and segments.
+    """
+    settings = config.VIDEO_SETTINGS
+    return {
+        'codec': settings["codec"],
+        'fps': settings["fps"],
+        'bitrate': settings["bitrate"],
+        'preset': settings["preset"],
+        'threads': settings["threads"],
+        'ffmpeg_params': [
+            "-crf", str(settings["crf"])
+        ],
+    }
+
+
+def log_render(output_path: str, engine: str, seconds: float, memory: dict = None):
+    """
+    Append a render's profile, encode time, output size and peak memory
+    (MemorySampler.peaks() of the render) to the render log.
+    """
+    memory = memory or {}
+    settings = config.VIDEO_SETTINGS
+    size = os.path.getsize(output_path)
+    os.makedirs(os.path.dirname(settings["render_log"]), exist_ok=True)
+    with open(settings["render_log"], 'a') as f:
+        f.write(json.dumps({
+            "output": output_path,
+            "profile": settings["profile"],
+            "engine": engine,
+            "size": [settings["width"], settings["height"]],
+            "fps": settings["fps"],
+            "encode_seconds": round(seconds, 3),
+            "file_bytes": size,
+            # Peaks during this render only: the Python process, its children (ffmpeg, workers), and both
+            "peak_rss_mb": memory.get("process_mb"),
+            "children_peak_rss_mb": memory.get("children_mb"),
+            "total_peak_rss_mb": memory.get("total_mb"),
+            "finished_at": datetime.now().isoformat(timespec='seconds'),
+        }) + "\n")
+    print(f"Rendered {output_path} with profile '{settings['profile']}' in {seconds:.1f}s ({size / (1024 * 1024):.1f} MB)")
+
+
+def load_background(background: dict = None) -> VideoFileClip:
+    """
+    Open the background mezzanine, already cropped to 9:16 at the output size and fps.
+    """
+    background = background or prepare_background()
+    return VideoFileClip(background["path"], audio=False)
+
+
+def with_characters(video, lines: list, sprites: dict, offset: float = 0.0):
+    """
+    Blit the speaking character's sprite at the bottom of each frame.
+    Line times are shifted back by offset seconds.
+    """
+    starts = [line["start"] - offset for line in lines]
+
+    def overlay(get_frame, t):
+        frame = get_frame(t)
+        index = bisect.bisect_right(starts, t) - 1
+        if index < 0 or t >= lines[index]["end"] - offset:
+            return frame
+        sprite, side = sprites[lines[index]["speaker"]]
+        frame = frame.copy()  # The reader may hand back its own buffer
+        x = 0 if side == 'left' else frame.shape[1] - sprite["width"]
+        blit_sprite(frame, sprite, x, frame.shape[0] - sprite["height"])
+        return frame
+
+    return video.fl(overlay)
+
+
+def subtitle_clip(line: dict, video, offset: float = 0.0) -> ImageClip:
+    """
+    Subtitle clip for one timeline line, shifted back by offset seconds.
+    """
+    # Pre-rendered subtitle with transparent background
+    txt_clip = ImageClip(render_subtitle(line["text"], line["speaker"], video.w))
+    txt_clip = txt_clip.set_start(line["start"] - offset).set_end(line["end"] - offset)
+
+    # Position the text higher in the video
+    return txt_clip.set_position(('center', video.h * config.VIDEO_SETTINGS["subtitle_y"]))
+
+
+def output_frame(seconds: float) -> int:
+    """
+    Output frame index of a source timestamp once the video is sped up.
+    """
+    return round(seconds / SPEED_FACTOR * config.VIDEO_SETTINGS["fps"])
+
+
+def render_segment(line: dict, output_path: str, background: dict = None, offset: float = 0.0) -> str:
+    """
+    Render the (silent) video for a single timeline line, already sped up.
+    The background is read from offset seconds into the mezzanine.
+    Segments are cut on the output frame grid so they join without drift.
+    """
+    video = load_background(background)
+    try:
+        frames = output_frame(line["end"]) - output_frame(line["start"])
+        background = video.subclip(offset + line["start"], offset + line["end"])
+        background = with_characters(background, [line], load_character_sprites(video.w), offset=line["start"])
+        segment = CompositeVideoClip([background, subtitle_clip(line, background, offset=line["start"])])
+        segment = segment.speedx(factor=SPEED_FACTOR).set_duration(frames / config.VIDEO_SETTINGS["fps"])
+        settings = video_write_settings()
+        # Closed GOP so every segment decodes on its own and the concat needs no re-encode
+        settings['ffmpeg_params'] = settings['ffmpeg_params'] + ['-flags', '+cgop']
+        segment.write_videofile(output_path, audio=False, logger=None, **settings)
+        segment.close()
+    finally:
+        video.close()
+    return output_path
+
+
+def concat_segments(segment_paths: list, audio_file: str, output_path: str) -> str:
+    """
+    Join rendered segments and the (already sped-up) voiceover without re-encoding either.
+    """
+    list_path = f"{output_path}.segments.txt"
+    with open(list_path, 'w') as f:
+        for path in segment_paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+
+    try:
+        subprocess.run([
+            config.FFMPEG_BINARY, '-y', '-loglevel', 'error',
+            '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-i', audio_file,
+            '-map', '0:v', '-map', '1:a',
+            '-c:v', 'copy',
+            '-c:a', 'copy',
+            '-shortest',
+            output_path
+        ], check=True)
+    finally:
+        os.remove(list_path)
+    return output_path
+
+
+def render_segments(timeline: dict, audio_file: str, output_path: str, workers: int) -> str:
+    """
+    Split the timeline at dialogue-line boundaries, render and encode the
+    segments in a process pool and join them without re-encoding.
+    """
+    background = prepare_background()
+    offset = pick_offset(background, timeline["duration"])
+    # Rasterize the subtitles once here instead of racing for them in every worker
+    render_subtitles(timeline["lines"], config.VIDEO_SETTINGS["width"])
+
+    segments_dir = tempfile.mkdtemp(prefix='segments-', dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            segments = [
+                executor.submit(render_segment, line, os.path.join(segments_dir, f"{index:04d}.mp4"), background, offset)
+                for index, line in enumerate(timeline["lines"])
+            ]
+            segment_paths = [segment.result() for segment in segments]
+        return concat_segments(segment_paths, audio_file, output_path)
+    finally:
+        shutil.rmtree(segments_dir, ignore_errors=True)
+
+
+def render_moviepy(timeline: dict, audio_file: str, output_path: str) -> str:
+    """
+    Render the final video by compositing every frame in MoviePy.
+    """
+    # Load the background, starting at a random keyframe with enough footage left
+    duration = timeline["duration"]
+    background = prepare_background()
+    offset = pick_offset(background, duration)
+    video = load_background(background)
+
+    # Trim video to match the (unsped) voiceover duration
+    video = video.subclip(offset, offset + duration)
+
+    # Blit the pre-scaled character sprites straight onto the background frames
+    video = with_characters(video, timeline["lines"], load_character_sprites(video.w))
+
+    # Rasterize all subtitles up front on the thread pool; subtitle_clip then hits the cache
+    render_subtitles(timeline["lines"], video.w)
+
+    # Create a subtitle clip for each line
+    overlay_clips = [subtitle_clip(line, video) for line in timeline["lines"]]
 
-if not IMAGE_MAGICK_PATH:
-    raise ValueError("IMAGEMAGICK_BINARY is not set")
+    # Combine all clips
+    final_video = CompositeVideoClip([video] + overlay_clips)
 
-moviepy.config.IMAGEMAGICK_BINARY = IMAGE_MAGICK_PATH
+    # Speed up the video by 1.1x
+    final_video = final_video.speedx(factor=SPEED_FACTOR)
 
+    # Write the result with higher quality settings. Given a file name, MoviePy
+    # muxes that audio with -acodec copy: the voiceover is already sped up and AAC
+    final_video.write_videofile(
+        output_path,
+        audio=audio_file,
+        **video_write_settings()
+    )
 
-def generate_video() -> str:
+    # Close clips
+    video.close()
+    final_video.close()
+    return output_path
+
+
+def generate_video(audio_file: str = 'generated/audios/combined_voiceover.m4a', output_path: str = 'final_video.mp4',
+                   engine: str = None, segment_workers: int = None) -> str:
     """
     Generate a vertical video with background footage, audio, subtitles and character images.
+    engine is "moviepy" (composite frames in Python), "ffmpeg" (one native filtergraph encode)
+    or "stream" (fixed-memory frame streaming between two ffmpeg pipes);
+    it defaults to VIDEO_SETTINGS["engine"]. With segment_workers > 1 the MoviePy engine
+    renders one segment per dialogue line in that many processes.
     Returns the path to the generated video.
     """
-    background_video_url = config.YOUTUBE_SETTINGS['background_video_url']
-    audio_file = 'generated/audios/combined_voiceover.mp3'
-    script_file = 'generated/scripts/generated_script.json'
-    output_path = 'final_video.mp4'
+    engine = engine or config.VIDEO_SETTINGS["engine"]
+    segment_workers = segment_workers or config.VIDEO_SETTINGS["segment_workers"]
     try:
-        download_sample_video(background_video_url)
-        
-        # Load the script
-        with open(script_file, 'r') as f:
-            script = json.load(f)
-        
-        # Load video and audio
-        video = VideoFileClip('samples/video/video.mp4')
-        audio = AudioFileClip(audio_file)
-        
-        # Load character images and scale them appropriately
-        character1_img = ImageClip(config.CHARACTERS["character1"]["image_path"]).resize(width=video.w * 0.45).set_position(('left', 'bottom'))
-        character2_img = ImageClip(config.CHARACTERS["character2"]["image_path"]).resize(width=video.w * 0.45).set_position(('right', 'bottom'))
-        
-        # Crop video to 9:16 aspect ratio (1440x2560 for 1440p)
-        w, h = video.size
-        target_w = h * 9/16
-        x_center = w/2
-        crop_x1 = x_center - target_w/2
-        video = video.crop(x1=crop_x1, width=target_w)
-        
-        # Resize to 1440p while maintaining 9:16 aspect ratio
-        video = video.resize(width=1440)  # Height will automatically be 2560 to maintain aspect ratio
-        
-        # Trim video to match audio duration
-        video = video.subclip(0, audio.duration)
-        
-        # Create subtitle and character clips
-        subtitle_clips = []
-        character_clips = []
-        current_time = 0
-        
-        # Style for Character1's subtitles
-        character1_style = {
-            'font': 'Arial-Bold',
-            'fontsize': 85,  # Increased font size for higher resolution
-            'color': 'white',
-            'stroke_color': 'black',
-            'stroke_width': 4,  # Increased stroke width for better visibility
-            'size': (video.w * 0.8, None),
-            'method': 'caption',
-            'align': 'center',
-        }
-        
-        # Style for Character2's subtitles
-        character2_style = {
-            'font': 'Arial-Bold', 
-            'fontsize': 85,  # Increased font size for higher resolution
-            'color': 'yellow',
-            'stroke_color': 'black',
-            'stroke_width': 4,  # Increased stroke width for better visibility
-            'size': (video.w * 0.8, None),
-            'method': 'caption',
-            'align': 'center',
-        }
-        
-        # Create subtitle clips and character images for each line
-        for line_id, line_data in script.items():
-            if config.CHARACTERS["character1"]["name"] in line_data:
-                text = line_data[config.CHARACTERS["character1"]["name"]].replace('*', '').replace('"', '')
-                style = character1_style
-                character = config.CHARACTERS["character1"]["name"]
-                char_img = character1_img
-                position = ('left', 'bottom')  # Left side, at bottom
+        # Load the line timing recorded by the voiceover stage
+        timeline = load_timeline(audio_file)
+        start = time.perf_counter()
+
+        with MemorySampler() as memory:
+            if engine == "ffmpeg":
+                render_ffmpeg(timeline, audio_file, output_path)
+            elif engine == "stream":
+                render_stream(timeline, audio_file, output_path)
+            elif engine != "moviepy":
+                raise ValueError(f"Unknown render engine: {engine}")
+            elif segment_workers > 1:
+                render_segments(timeline, audio_file, output_path, segment_workers)
+                engine = f"moviepy-segments-{segment_workers}"
             else:
-                text = line_data[config.CHARACTERS["character2"]["name"]].replace('*', '').replace('"', '')
-                style = character2_style
-                character = config.CHARACTERS["character2"]["name"]
-                char_img = character2_img
-                position = ('right', 'bottom')  # Right side, at bottom
-                
-            # Get audio duration for timing
-            audio_path = f"generated/audios/{line_id}_{character}.wav"
-            audio_info = mediainfo(audio_path)
-            duration = float(audio_info['duration'])
-            
-            # Create text clip with transparent background
-            txt_clip = TextClip(
-                text,
-                **style
-            ).set_start(current_time).set_end(current_time + duration)
-            
-            # Position the text higher in the video
-            txt_clip = txt_clip.set_position(('center', video.h*0.5 - video.h * 0.25))
-            subtitle_clips.append(txt_clip)
-            
-            # Add character image for this line's duration
-            char_clip = char_img.set_start(current_time).set_end(current_time + duration)
-            char_clip = char_clip.set_position(position)
-            char_clip = char_clip.resize(width=video.w * 0.45)
-            character_clips.append(char_clip)
-            
-            # Update timing for next subtitle
-            current_time += duration
-        
-        # Combine all clips
-        final_video = CompositeVideoClip([video] + subtitle_clips + character_clips)
-        
-        # Add audio and ensure sync
-        final_video = final_video.set_audio(audio)
-        
-        # Speed up the video by 1.1x
-        final_video = final_video.speedx(factor=1.1)
-        
-        # Write the result with higher quality settings
-        final_video.write_videofile(
-            output_path,
-            codec='libx264',
-            audio_codec='aac',
-            temp_audiofile='temp-audio.m4a',
-            remove_temp=True,
-            fps=60,
-            bitrate="16000k",  # High bitrate for quality
-            preset='slow',  # Slower encoding for better quality
-            threads=4,
-            ffmpeg_params=[
-                "-crf", "18"  # Lower CRF value for higher quality (range 0-51, lower is better)
-            ]
-        )
-        
-        # Close clips
-        video.close()
-        audio.close()
-        final_video.close()
-        character1_img.close()
-        character2_img.close()
-        
+                render_moviepy(timeline, audio_file, output_path)
+
+        log_render(output_path, engine, time.perf_counter() - start, memory.peaks())
         print(f"Video generated successfully: {output_path}")
         return output_path
-        
+
     except Exception as e:
         print(f"Video generation failed: {str(e)}")
         raise
@@ -167,4 +270,4 @@ if __name__ == "__main__":
         print(f"Video generated successfully: {output_file}")
     except Exception as e:
         print(f"Video generation failed: {str(e)}")
-        raise
\ No newline at end of file
+        raise
@@ -2,96 +2,469 @@ import os
 import outetts
 import torch
 import json
-from pydub import AudioSegment
-from outetts.models import hf_model
+import time
+import multiprocessing
+import secrets
+import socket
+import struct
+from multiprocessing import connection
+from outetts.utils.chunking import chunk_text
+from outetts.version.playback import ModelOutput
 from scripts.config import *
+from scripts.audio_assembly import concatenate, encode, to_pcm, write_wav
+from scripts.helpers.file_lock import file_lock
+from scripts.timeline import build_timeline, line_samples, save_timeline, timeline_entry
+from scripts.tts_cache import TTSCache
+from scripts.tts_factory import check_backend, create_interface
 
+# Backends whose model can decode several left-padded prompts in one generate() call
+BATCH_BACKENDS = {"HF"}
 
-def generate_voiceover() -> str:
+
+def generation_config(text: str, speaker) -> outetts.GenerationConfig:
+    """
+    Generation settings for one line. Keep in sync with the TTS cache key.
+    """
+    return outetts.GenerationConfig(
+        text=text,
+        speaker=speaker,
+        sampler_config=outetts.SamplerConfig(**TTS_SETTINGS["generation"]),
+    )
+
+
+class LocalSynthesizer:
+    """
+    Synthesizes dialogue lines with a model loaded into the current process.
+    Lines come back as (mono float32 PCM, sample rate).
+    """
+
+    def __init__(self, backend: str = None, quantization: str = None):
+        self.backend = backend or TTS_SETTINGS["backend"]
+        self.interface = create_interface(backend, quantization)
+        self.speakers = {
+            character["name"]: self.interface.load_speaker(character["audio_json_path"])
+            for character in CHARACTERS.values()
+        }
+        self.supports_batch = self.backend in BATCH_BACKENDS
+
+    def _generate_tokens(self, text: str, speaker) -> list:
+        """
+        Tokens generated for one line, chunk by chunk as interface.generate() does.
+        """
+        config = generation_config(text, speaker)
+        tokens = []
+        for chunk in chunk_text(text):
+            tokens.extend(self.interface._generate(self.interface.prepare_prompt(chunk, speaker), config))
+        return tokens
+
+    def _decode(self, tokens: list) -> tuple:
+        audio = self.interface.get_audio(tokens)
+        if audio is None:
+            raise RuntimeError("TTS output contains no audio tokens")
+        return to_pcm(ModelOutput(audio, self.interface.audio_codec.sr))
+
+    def synthesize(self, text: str, character: str) -> tuple:
+        return self._decode(self._generate_tokens(text, self.speakers[character]))
+
+    def _generate_batch(self, texts: list, speaker) -> list:
+        """
+        Tokens generated for several lines in a single generate() call on the HF model.
+        Every chunk of every line becomes one row, left-padded to the longest prompt
+        with an attention mask so the padding is ignored. Rows that finish early are
+        padded by generate() until the longest one is done, so each row is cut at its
+        first end or padding token.
+        """
+        hf_model = self.interface.model
+        tokenizer = self.interface.prompt_processor.tokenizer
+        config = generation_config(texts[0], speaker)
+        sampler = config.sampler_config
+
+        rows = [
+            (index, self.interface.prepare_prompt(chunk, speaker)[0].tolist())
+            for index, text in enumerate(texts)
+            for chunk in chunk_text(text)
+        ]
+        pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        width = max(len(prompt) for _, prompt in rows)
+        input_ids = torch.full((len(rows), width), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+        for row, (_, prompt) in enumerate(rows):
+            input_ids[row, width - len(prompt):] = torch.tensor(prompt, dtype=torch.long)
+            attention_mask[row, width - len(prompt):] = 1
+
+        with torch.inference_mode():
+            output = hf_model.model.generate(
+                input_ids.to(hf_model.device),
+                attention_mask=attention_mask.to(hf_model.device),
+                # Padding counts towards max_length, so bound the new tokens instead
+                max_new_tokens=config.max_length - width,
+                do_sample=sampler.temperature > 0,
+                temperature=sampler.temperature,
+                repetition_penalty=sampler.repetition_penalty,
+                top_k=sampler.top_k,
+                top_p=sampler.top_p,
+                min_p=sampler.min_p,
+                pad_token_id=pad_id,
+            )
+
+        eos = hf_model.model.generation_config.eos_token_id
+        stop = {pad_id, *(eos if isinstance(eos, list) else [eos])}
+        line_tokens = [[] for _ in texts]
+        for row, (index, _) in enumerate(rows):
+            for token in output[row, width:].tolist():
+                if token in stop:
+                    break
+                line_tokens[index].append(token)
+        return line_tokens
+
+    def synthesize_batch(self, character: str, texts: list) -> tuple:
+        """
+        Decode several lines for one speaker together and report throughput.
+        Backends in BATCH_BACKENDS decode the lines in one padded batch; on the
+        others (llama.cpp) the lines are decoded one after another.
+        Returns the list of (PCM, sample rate) and the batch stats.
+        """
+        speaker = self.speakers[character]
+        start = time.perf_counter()
+
+        if self.supports_batch:
+            line_tokens = self._generate_batch(texts, speaker)
+        else:
+            print(f"Batched decoding is not available on the {self.backend} backend, decoding {len(texts)} lines one at a time")
+            line_tokens = [self._generate_tokens(text, speaker) for text in texts]
+        audios = [self._decode(tokens) for tokens in line_tokens]
+        tokens = sum(len(tokens) for tokens in line_tokens)
+        elapsed = time.perf_counter() - start
+
+        audio_seconds = sum(len(pcm) / sample_rate for pcm, sample_rate in audios)
+        stats = {
+            "lines": len(texts),
+            "batched": self.supports_batch,
+            "elapsed": elapsed,
+            "audio_seconds": audio_seconds,
+            "tokens": tokens,
+            "tokens_per_sec": tokens / elapsed,
+            "audio_seconds_per_sec": audio_seconds / elapsed,
+        }
+        return audios, stats
+
+    def close(self):
+        pass
+
+
+class RemoteSynthesizer:
+    """
+    Forwards synthesis requests to a running TTS server (see scripts/tts_server.py).
+    """
+
+    def __init__(self, conn: connection.Connection):
+        self.conn = conn
+
+    def _call(self, op: str, **args):
+        self.conn.send({"op": op, "args": args})
+        reply = self.conn.recv()
+        if reply["status"] != "ok":
+            raise RuntimeError(f"TTS server {op} failed: {reply['error']}")
+        return reply["result"]
+
+    def synthesize(self, text: str, character: str) -> tuple:
+        return self._call("synthesize", text=text, character=character)
+
+    def synthesize_batch(self, character: str, texts: list) -> tuple:
+        return self._call("synthesize_batch", character=character, texts=texts)
+
+    def close(self):
+        self.conn.close()
+
+
+def tts_authkey() -> bytes:
+    """
+    Shared secret of the TTS server: TTS_SERVER_AUTHKEY if set, otherwise a
+    random key generated once per host and kept in a file only its owner can read.
+    The server unpickles what authenticated clients send, so the key must not be guessable.
+    """
+    if TTS_SERVER["authkey"]:
+        return TTS_SERVER["authkey"].encode()
+
+    path = TTS_SERVER["authkey_file"]
+    with file_lock(path):
+        if not os.path.exists(path):
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                f.write(secrets.token_hex(32))
+    if os.name == 'posix' and os.stat(path).st_mode & 0o077:
+        raise PermissionError(f"{path} is readable by other users; run chmod 600 on it")
+    with open(path, 'r') as f:
+        return f.read().strip().encode()
+
+
+def set_recv_timeout(conn: connection.Connection, seconds: float):
+    """
+    Make blocking reads on a connection's socket fail after seconds (0 waits forever).
+    """
+    sock = socket.socket(fileno=conn.fileno())
+    try:
+        if os.name == 'nt':
+            value = struct.pack('L', int(seconds * 1000))
+        else:
+            value = struct.pack('ll', int(seconds), int(seconds % 1 * 1e6))
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO, value)
+    finally:
+        sock.detach()
+
+
+def connect_tts_server():
+    """
+    Connect to the TTS server. Returns None if no server is listening, or if
+    whatever listens on the port doesn't complete the handshake with our key in time.
+    """
+    address = (TTS_SERVER["host"], TTS_SERVER["port"])
+    timeout = TTS_SERVER["handshake_timeout"]
+    try:
+        authkey = tts_authkey()
+        sock = socket.create_connection(address, timeout=timeout)
+        sock.setblocking(True)
+        conn = connection.Connection(sock.detach())
+    except OSError:
+        return None
+
+    # Same handshake as connection.Client, but bounded by the timeout
+    try:
+        set_recv_timeout(conn, timeout)
+        connection.answer_challenge(conn, authkey)
+        connection.deliver_challenge(conn, authkey)
+        set_recv_timeout(conn, 0)
+        return conn
+    except (OSError, EOFError, connection.AuthenticationError) as e:
+        print(f"TTS server at {address[0]}:{address[1]} failed the handshake: {str(e)}")
+        conn.close()
+        return None
+
+
+def get_synthesizer():
+    """
+    Use the TTS server when one is running, otherwise load the model in-process.
+    """
+    conn = connect_tts_server()
+    if conn is not None:
+        print(f"Using TTS server at {TTS_SERVER['host']}:{TTS_SERVER['port']}")
+        return RemoteSynthesizer(conn)
+    print("No TTS server running, loading model in-process")
+    return LocalSynthesizer()
+
+
+def finish_line(line: dict, audio: tuple, on_line=None):
+    """
+    Attach synthesized audio to a line and hand it to the caller's callback.
+    """
+    line["audio"] = audio
+    if on_line is not None:
+        on_line(line)
+
+
+def synthesize_batched(synthesizer, lines: list, batch_size: int, on_line=None):
+    """
+    Group lines per speaker into batches of batch_size and synthesize each batch together.
+    """
+    by_character = {}
+    for line in lines:
+        by_character.setdefault(line["character"], []).append(line)
+
+    for character, character_lines in by_character.items():
+        for i in range(0, len(character_lines), batch_size):
+            batch = character_lines[i:i + batch_size]
+            audios, stats = synthesizer.synthesize_batch(character, [line["text"] for line in batch])
+            print(
+                f"{'Batch' if stats['batched'] else 'Serial batch'} of {stats['lines']} {character} lines: "
+                f"{stats['audio_seconds']:.1f}s audio in {stats['elapsed']:.1f}s "
+                f"({stats['tokens']} tokens, {stats['tokens_per_sec']:.0f} tokens/sec, {stats['audio_seconds_per_sec']:.2f} audio-sec/sec)"
+            )
+            for line, audio in zip(batch, audios):
+                finish_line(line, audio, on_line)
+
+
+# Per-process synthesizer for the worker pool
+_worker_synthesizer = None
+
+
+def _init_worker(threads: int):
+    global _worker_synthesizer
+    # Cap torch threads so N workers don't oversubscribe the cores
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    _worker_synthesizer = LocalSynthesizer()
+
+
+def _worker_synthesize(task: tuple) -> tuple:
+    index, text, character = task
+    return index, _worker_synthesizer.synthesize(text, character)
+
+
+def synthesize_parallel(lines: list, workers: int, on_line=None):
+    """
+    Shard lines across a pool of worker processes, each holding its own model.
+    Lines are handed out one at a time so long and short lines balance out.
+    """
+    # A worker that fails to load the model is respawned by the pool forever, so fail here instead
+    check_backend()
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"Synthesizing {len(lines)} lines with {workers} workers x {threads} threads")
+    tasks = [(index, line["text"], line["character"]) for index, line in enumerate(lines)]
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(threads,)) as pool:
+        for index, audio in pool.imap_unordered(_worker_synthesize, tasks):
+            finish_line(lines[index], audio, on_line)
+
+
+def synthesize_lines(lines: list, batch_size: int = 1, workers: int = 1, synthesizer=None, on_line=None):
+    """
+    Synthesize lines using the worker pool, batches, or one line at a time.
+    Each line gets its (PCM, sample rate) under line["audio"], and on_line(line)
+    is called as soon as it is done (not necessarily in script order).
+    """
+    if workers > 1:
+        synthesize_parallel(lines, workers, on_line)
+        return
+
+    own_synthesizer = synthesizer is None
+    if own_synthesizer:
+        synthesizer = get_synthesizer()
+    try:
+        if batch_size > 1:
+            synthesize_batched(synthesizer, lines, batch_size, on_line)
+        else:
+            for line in lines:
+                finish_line(line, synthesizer.synthesize(line["text"], line["character"]), on_line)
+    finally:
+        if own_synthesizer:
+            synthesizer.close()
+
+
+def parse_script(script: dict, audios_path: str) -> list:
     """
-    Generate voiceovers for characters using Outetts and combine them into a single audio file.
-    Each dialogue is generated and stored separately, then combined in sequence.
+    Turn the script into an ordered list of lines with their character and output path.
+    """
+    # Validate script format
+    if not isinstance(script, dict):
+        raise ValueError("Script must be a dictionary with numbered keys")
+
+    lines = []
+    for key in sorted(script.keys(), key=int):
+        dialogue = script[key]
+
+        # Determine character
+        if 'walter' in dialogue:
+            character = CHARACTERS["character1"]["name"]
+            text = dialogue['walter']
+        elif 'jesse' in dialogue:
+            character = CHARACTERS["character2"]["name"]
+            text = dialogue['jesse']
+        else:
+            raise ValueError(f"Dialogue {key} must contain either {CHARACTERS['character1']['name']} or {CHARACTERS['character2']['name']}")
+
+        lines.append({
+            "key": key,
+            "character": character,
+            "text": text,
+            "path": f"{audios_path}/{key}_{character}.wav",
+        })
+    return lines
+
+
+def generate_voiceover(script_path: str = 'generated/scripts/generated_script.json', audios_path: str = 'generated/audios',
+                       batch_size: int = None, workers: int = None, save_wavs: bool = None, on_line_ready=None) -> str:
+    """
+    Generate voiceovers for characters using Outetts and combine them into a single audio file
+    (combined_voiceover.m4a in audios_path, which is emptied first).
+    Lines are kept in memory, joined once and encoded in a single ffmpeg pass
+    that also applies the video speed-up, so renders can copy the audio as is;
+    per-line WAVs are only written when save_wavs is set. A timing manifest
+    (see scripts/timeline.py) is saved next to the combined audio.
+    With batch_size > 1, lines are grouped per speaker and decoded in batches;
+    with workers > 1, lines are spread over a pool of model processes.
+    on_line_ready(entry) is called with each line's timeline entry, in script
+    order, as soon as the line and all lines before it are synthesized.
     Returns the path to the combined audio file.
     """
     try:
-        script_path = 'generated/scripts/generated_script.json'
-        audios_path = 'generated/audios'
-        
-        # remove everything inside generated/audios
+        output_path = f'{audios_path}/combined_voiceover.m4a'
+        if batch_size is None:
+            batch_size = TTS_SETTINGS["batch_size"]
+        if workers is None:
+            workers = TTS_SETTINGS["workers"]
+        if save_wavs is None:
+            save_wavs = TTS_SETTINGS["save_line_wavs"]
+
+        # remove everything inside audios_path
+        os.makedirs(audios_path, exist_ok=True)
         for file in os.listdir(audios_path):
             os.remove(os.path.join(audios_path, file))
-        
-        # Initialize Outetts
-        interface = outetts.Interface(
-            config=outetts.ModelConfig(
-                model_path="OuteAI/Llama-OuteTTS-1.0-1B", 
-                tokenizer_path="OuteAI/Llama-OuteTTS-1.0-1B",
-                interface_version=outetts.InterfaceVersion.V3,
-                backend=outetts.Backend.HF,
-                quantization=outetts.LlamaCppQuantization.FP16,
-                device=torch.device("cuda" if torch.cuda.is_available() else "cpu"),
-                dtype=torch.bfloat16
-            )
-        )
 
-        # Load speaker profiles
-        character1_speaker = interface.load_speaker(CHARACTERS["character1"]["audio_json_path"])
-        character2_speaker = interface.load_speaker(CHARACTERS["character2"]["audio_json_path"])
-        
         # Read the script
         with open(script_path, 'r') as f:
             script = json.load(f)
-            
-        # Validate script format
-        if not isinstance(script, dict):
-            raise ValueError("Script must be a dictionary with numbered keys")
-            
-        audio_segments = []
-        
-        # Process each dialogue in order
-        for key in sorted(script.keys(), key=int):
-            dialogue = script[key]
-            
-            # Determine character and get appropriate speaker
-            if 'walter' in dialogue:
-                character = CHARACTERS["character1"]["name"]
-                speaker = character1_speaker
-                text = dialogue['walter']
-            elif 'jesse' in dialogue:
-                character = CHARACTERS["character2"]["name"]
-                speaker = character2_speaker
-                text = dialogue['jesse']
+        lines = parse_script(script, audios_path)
+
+        # Lines become ready out of order (pool, batches), but timing is only
+        # known once every earlier line is done, so release them in order
+        ready = {"index": 0, "offset": 0}
+
+        def release_ready_lines():
+            while ready["index"] < len(lines) and "audio" in lines[ready["index"]]:
+                line = lines[ready["index"]]
+                if on_line_ready is not None:
+                    on_line_ready(timeline_entry(line, ready["offset"], line["audio"][1]))
+                ready["offset"] += line_samples(line)
+                ready["index"] += 1
+
+        cache = TTSCache()
+
+        def on_line(line):
+            # Cache each line right away, so a crash keeps the work done so far
+            cache.put(line["cache_key"], *line["audio"])
+            if save_wavs:
+                write_wav(line["path"], *line["audio"])
+                print(f"Saved individual audio to {line['path']}")
+            release_ready_lines()
+
+        # Reuse previously synthesized lines
+        pending = []
+        for line in lines:
+            line["cache_key"] = cache.key(line["text"], line["character"])
+            audio = cache.get(line["cache_key"])
+            if audio is not None:
+                line["audio"] = audio
+                if save_wavs:
+                    write_wav(line["path"], *audio)
             else:
-                raise ValueError(f"Dialogue {key} must contain either {CHARACTERS['character1']['name']} or {CHARACTERS['character2']['name']}")
-            
-            # Generate audio for the line
-            audio = interface.generate(
-                config=outetts.GenerationConfig(
-                    text=text,
-                    speaker=speaker,
-                )
-            )
-            
-            # Save individual audio file
-            individual_file = f"{audios_path}/{key}_{character}.wav"
-            audio.save(individual_file)
-            print(f"Saved individual audio to {individual_file}")
-            
-            # Load audio segment
-            segment = AudioSegment.from_wav(individual_file)
-            audio_segments.append(segment)
-        
-        # Combine all segments in sequence
-        combined = AudioSegment.empty()
-        for segment in audio_segments:
-            combined += segment
-        
-        # Export the combined audio
-        combined.export('generated/audios/combined_voiceover.mp3', format="mp3")
-        print(f"Combined voiceover saved to generated/audios/combined_voiceover.mp3")
-        
-        return 'generated/audios/combined_voiceover.mp3'
-            
+                pending.append(line)
+        print(f"TTS cache: {cache.stats()}")
+        release_ready_lines()
+
+        if pending:
+            synthesize_lines(pending, batch_size=batch_size, workers=workers, on_line=on_line)
+
+        # Join all lines in script order, speed up and encode to AAC once
+        sample_rates = {line["audio"][1] for line in lines}
+        if len(sample_rates) != 1:
+            raise ValueError(f"Lines have mismatched sample rates: {sorted(sample_rates)}")
+        sample_rate = sample_rates.pop()
+        combined = concatenate([line["audio"][0] for line in lines])
+        speed = VIDEO_SETTINGS["speed"]
+        encode(combined, sample_rate, output_path, codec_args=[
+            '-filter:a', f'atempo={speed}',
+            '-c:a', AUDIO_SETTINGS["codec"], '-b:a', AUDIO_SETTINGS["bitrate"]
+        ])
+        print(f"Combined voiceover saved to {output_path}")
+
+        # Record the per-line timing so the video stage doesn't have to probe audio
+        manifest_path = save_timeline(build_timeline(lines, sample_rate, output_path, speed), output_path)
+        print(f"Timeline saved to {manifest_path}")
+
+        return output_path
+
     except Exception as e:
         print(f"Voiceover generation failed: {str(e)}")
         raise
@@ -102,4 +475,4 @@ if __name__ == "__main__":
         print(f"Voiceover generated successfully: {output_file}")
     except Exception as e:
         print(f"Voiceover generation failed: {str(e)}")
-        raise
\ No newline at end of file
+        raise
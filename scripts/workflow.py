@@ -0,0 +1,179 @@
+"""
+Incremental workflow engine.
+
+Each stage declares the files it reads and writes. The engine records a
+content hash of every input and output after a stage succeeds, and on the
+next run skips any stage whose inputs are unchanged and whose outputs are
+still intact, much like make. Independent stages (e.g. the two uploads)
+run concurrently. Per-stage timings are kept in the state file and appended
+to logs/stage_timings.jsonl.
+"""
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from scripts.error_handler import logging
+from scripts.helpers.hashing import file_sha256
+
+STATE_FILE = "generated/workflow_state.json"
+TIMINGS_LOG = "logs/stage_timings.jsonl"
+
+
+class Stage:
+    """
+    One step of the workflow.
+    run is called with no arguments. inputs and outputs are file paths;
+    deps names stages that must run first. always_run stages (e.g. topic
+    generation, which has no inputs) run every time.
+    """
+
+    def __init__(self, name: str, run, inputs: list = (), outputs: list = (), deps: list = (), always_run: bool = False):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.always_run = always_run
+
+
+def hash_files(paths: list) -> dict:
+    """
+    Content hashes for paths; missing files hash to None.
+    """
+    return {path: file_sha256(path) if os.path.exists(path) else None for path in paths}
+
+
+class Workflow:
+    """
+    Runs stages in dependency order, skipping the ones that are up to date.
+    """
+
+    def __init__(self, stages: list, state_file: str = STATE_FILE, max_workers: int = 4):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_file = state_file
+        self.max_workers = max_workers
+        self.state = self._load_state()
+
+    def _load_state(self) -> dict:
+        if os.path.exists(self.state_file):
+            with open(self.state_file, 'r') as f:
+                return json.load(f)
+        return {}
+
+    def _save_state(self):
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=4)
+        os.replace(tmp_path, self.state_file)
+
+    def order(self) -> list:
+        """
+        Stage names in dependency order (stable with respect to declaration order).
+        """
+        ordered = []
+        visiting = set()
+
+        def visit(name):
+            if name in ordered:
+                return
+            if name in visiting:
+                raise ValueError(f"Workflow has a dependency cycle at stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            ordered.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return ordered
+
+    def is_up_to_date(self, stage: Stage) -> bool:
+        record = self.state.get(stage.name)
+        if stage.always_run or record is None:
+            return False
+        if record["inputs"] != hash_files(stage.inputs):
+            return False
+        # Outputs that were deleted or edited by hand need rebuilding too
+        return record["outputs"] == hash_files(stage.outputs)
+
+    def run(self, force: set = frozenset(), skip: set = frozenset()) -> dict:
+        """
+        Run every stage that is out of date (or forced), in dependency order.
+        Stages whose dependencies are all settled run concurrently, up to
+        max_workers at a time. Stages in skip are not run at all. A failing
+        stage doesn't stop independent stages; only the stages depending on
+        it are blocked. Returns {stage name: "ran" | "up-to-date" | "skipped"
+        | "failed: <error>" | "blocked"}.
+        """
+        report = {}
+        pending = self.order()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                # Start (or settle) every stage whose dependencies have settled
+                for name in list(pending):
+                    stage = self.stages[name]
+                    if any(dep not in report for dep in stage.deps):
+                        continue
+                    pending.remove(name)
+                    if any(report[dep] == "blocked" or report[dep].startswith("failed") for dep in stage.deps):
+                        logging.warning(f"Stage '{name}' is blocked by a failed dependency")
+                        report[name] = "blocked"
+                    elif name in skip:
+                        report[name] = "skipped"
+                    elif name not in force and self.is_up_to_date(stage):
+                        logging.info(f"Stage '{name}' is up to date, skipping")
+                        report[name] = "up-to-date"
+                    else:
+                        running[executor.submit(self._run_stage, stage)] = name
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        duration = future.result()
+                    except Exception as e:
+                        logging.error(f"Stage '{name}' failed: {str(e)}")
+                        report[name] = f"failed: {str(e)}"
+                        continue
+
+                    # Save after every stage so an interrupted run resumes where it stopped
+                    stage = self.stages[name]
+                    self.state[name] = {
+                        "inputs": hash_files(stage.inputs),
+                        "outputs": hash_files(stage.outputs),
+                        "duration": duration,
+                        "finished_at": datetime.now().isoformat(timespec='seconds'),
+                    }
+                    self._save_state()
+                    self._log_timing(name, duration)
+                    report[name] = "ran"
+        return report
+
+    def _run_stage(self, stage: Stage) -> float:
+        """
+        Run one stage and return how long it took.
+        """
+        missing = [path for path in stage.inputs if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(f"Stage '{stage.name}' is missing inputs: {', '.join(missing)}")
+
+        logging.info(f"Running stage '{stage.name}'...")
+        start = time.perf_counter()
+        stage.run()
+        duration = time.perf_counter() - start
+        logging.info(f"Stage '{stage.name}' finished in {duration:.1f}s")
+        return duration
+
+    def _log_timing(self, name: str, duration: float):
+        os.makedirs(os.path.dirname(TIMINGS_LOG), exist_ok=True)
+        with open(TIMINGS_LOG, 'a') as f:
+            f.write(json.dumps({
+                "stage": name,
+                "duration": round(duration, 3),
+                "finished_at": self.state[name]["finished_at"],
+            }) + "\n")
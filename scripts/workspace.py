@@ -0,0 +1,94 @@
+"""
+Per-run working directories.
+
+Every run gets its own generated/runs/<run_id>/ tree for the topic, script,
+audio, video and workflow state, so several runs can execute side by side.
+Old runs are cleaned up according to RUN_RETENTION in scripts/config.py.
+"""
+import os
+import shutil
+import uuid
+from datetime import datetime
+import scripts.config as config
+
+RUNS_DIR = "generated/runs"
+
+
+class RunWorkspace:
+    """
+    Paths of one run's artifacts. Directories are created on construction.
+    """
+
+    def __init__(self, run_id: str = None):
+        self.run_id = run_id or f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.root = os.path.join(RUNS_DIR, self.run_id)
+        self.topic_path = os.path.join(self.root, "topic.txt")
+        self.script_path = os.path.join(self.root, "script.json")
+        self.audios_dir = os.path.join(self.root, "audios")
+        self.audio_path = os.path.join(self.audios_dir, "combined_voiceover.m4a")
+        self.videos_dir = os.path.join(self.root, "videos")
+        self.segments_dir = os.path.join(self.videos_dir, "segments")
+        self.video_path = os.path.join(self.videos_dir, "final_video.mp4")
+        self.state_file = os.path.join(self.root, "workflow_state.json")
+        # Left behind by delete_media(), so the run isn't resumed and uploaded again
+        self.media_deleted_marker = os.path.join(self.root, "media_deleted")
+
+        for path in (self.root, self.audios_dir, self.videos_dir):
+            os.makedirs(path, exist_ok=True)
+
+    def media_deleted(self) -> bool:
+        return os.path.exists(self.media_deleted_marker)
+
+    def delete_media(self):
+        """
+        Remove the run's audio and video (segments, variants and cover included).
+        The topic, script and workflow state are small and stay.
+        """
+        for path in (self.audios_dir, self.videos_dir):
+            shutil.rmtree(path, ignore_errors=True)
+        with open(self.media_deleted_marker, 'w') as f:
+            f.write(datetime.now().isoformat(timespec='seconds'))
+
+
+def run_ids() -> list:
+    """
+    Ids of every run, oldest first. Run ids start with their start time, so they sort chronologically.
+    """
+    if not os.path.isdir(RUNS_DIR):
+        return []
+    return sorted(name for name in os.listdir(RUNS_DIR) if os.path.isdir(os.path.join(RUNS_DIR, name)))
+
+
+def latest_run_id():
+    """
+    Id of the most recently started run, or None if there are none.
+    """
+    runs = run_ids()
+    return runs[-1] if runs else None
+
+
+def prune_runs(keep: int, current_run_id: str = None) -> list:
+    """
+    Delete every run but the keep newest ones (and current_run_id). keep 0 keeps them all.
+    Returns the ids of the deleted runs.
+    """
+    if not keep:
+        return []
+    deleted = []
+    for run_id in run_ids()[:-keep]:
+        if run_id == current_run_id:
+            continue
+        shutil.rmtree(os.path.join(RUNS_DIR, run_id), ignore_errors=True)
+        deleted.append(run_id)
+    return deleted
+
+
+def apply_retention(workspace: RunWorkspace, published: bool) -> list:
+    """
+    Clean up after a run: drop its media once it is published on both
+    platforms (if RUN_RETENTION["delete_uploaded_media"]), then prune old runs.
+    Returns the ids of the deleted runs.
+    """
+    if published and config.RUN_RETENTION["delete_uploaded_media"]:
+        workspace.delete_media()
+    return prune_runs(config.RUN_RETENTION["keep_runs"], workspace.run_id)